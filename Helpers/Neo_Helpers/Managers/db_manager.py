@@ -3,13 +3,28 @@ Database Manager for LeoBook
 Handles persistent storage for AI-learned CSS selectors and knowledge base.
 """
 
+import asyncio
+import atexit
 import json
+from collections import deque
 from pathlib import Path
+from typing import Optional
 
 # Knowledge base for selector storage
 KNOWLEDGE_FILE = Path("DB/knowledge.json")
 knowledge_db: dict = {}
 
+# Debounced persistence state (see schedule_save_knowledge)
+_dirty = False
+_flush_task: Optional[asyncio.Task] = None
+
+
+def _json_default(obj):
+    """Serialize non-JSON containers (e.g. learned-selector deques) as lists."""
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
 def load_knowledge():
     """Loads the selector knowledge base into memory."""
@@ -27,10 +42,40 @@ def save_knowledge():
     KNOWLEDGE_FILE.parent.mkdir(parents=True, exist_ok=True)
     try:
         with open(KNOWLEDGE_FILE, "w", encoding="utf-8") as f:
-            json.dump(knowledge_db, f, indent=4)
+            json.dump(knowledge_db, f, indent=4, default=_json_default)
     except Exception as e:
         print(f"Error saving knowledge: {e}")
 
 
+def schedule_save_knowledge(delay: float = 2.0):
+    """
+    Marks the knowledge base dirty and coalesces writes into one save after `delay`
+    seconds. Falls back to an immediate save when no event loop is running.
+    """
+    global _dirty, _flush_task
+    _dirty = True
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_knowledge()
+        return
+    if _flush_task is None or _flush_task.done():
+        _flush_task = loop.create_task(_debounced_flush(delay))
+
+
+async def _debounced_flush(delay: float):
+    await asyncio.sleep(delay)
+    flush_knowledge()
+
+
+def flush_knowledge():
+    """Saves the knowledge base if there are unsaved changes."""
+    global _dirty
+    if _dirty:
+        _dirty = False
+        save_knowledge()
+
+
 # Initialize on import
 load_knowledge()
+atexit.register(flush_knowledge)
@@ -4,6 +4,7 @@
 # It embodies the "observe, decide, act" loop.
 
 import asyncio
+import logging
 import os
 import sys
 import subprocess
@@ -235,6 +236,12 @@ if __name__ == "__main__":
     sys.stdout = Tee(original_stdout, log_file)
     sys.stderr = Tee(original_stderr, log_file)
 
+    # Module loggers (popup handling etc.) report through the same terminal log; only the
+    # project packages log at INFO, third-party libraries stay at the root WARNING level
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+    for name in ("Neo", "Sites"):
+        logging.getLogger(name).setLevel(logging.INFO)
+
     # Run the main async function
     try:
         asyncio.run(main())
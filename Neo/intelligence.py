@@ -67,11 +67,16 @@ async def get_selector_with_fallback(page, context_key: str, element_key: str, a
         print(f"    [Selector Fallback] No selector found for '{element_key}' in '{context_key}'")
         return ""
 
+    # Skip the on-page probe if this selector was validated moments ago
+    if SelectorManager.is_recently_validated(context_key, element_key, selector):
+        return selector
+
     # Try to use the selector
     try:
         # Quick validation - check if element exists
         count = await page.locator(selector).count()
         if count > 0:
+            SelectorManager.mark_validated(context_key, element_key, selector)
             return selector  # Selector works, return it
     except Exception as e:
         failure_reason = f"Validation failed: {str(e)}"
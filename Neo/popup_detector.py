@@ -6,6 +6,30 @@ Analyzes HTML content to detect popup overlays, modals, and layered structures.
 import re
 from typing import Dict, Any
 
+from .selector_manager import _detect_context_cached
+
+# In-browser counterpart of analyze_html's pattern scan. Mirrors re.findall semantics:
+# patterns with a capture group contribute the group text to the unique layer set.
+_ANALYZE_PAGE_JS = """(patterns) => {
+    const html = document.documentElement.outerHTML;
+    const matchAll = (sources) => {
+        const found = [];
+        for (const source of sources) {
+            for (const m of html.matchAll(new RegExp(source, 'gi'))) {
+                found.push(m.length > 1 ? m[1] : m[0]);
+            }
+        }
+        return found;
+    };
+    return {
+        overlay_count: matchAll(patterns.overlay).length,
+        popup_count: matchAll(patterns.popup).length,
+        multi_step_count: matchAll(patterns.multi_step).length,
+        layer_count: new Set(matchAll(patterns.layer)).size,
+        pointer_events_blocking: html.toLowerCase().includes('pointer-events: none'),
+    };
+}"""
+
 
 class PopupDetector:
     """Detects and analyzes popup structures in HTML content"""
@@ -63,60 +87,87 @@ class PopupDetector:
         Returns:
             dict: Analysis results with detection flags and metadata
         """
-        analysis = {
-            'has_popup': False,
-            'has_overlay': False,
-            'is_multi_step': False,
-            'layer_count': 0,
-            'blocking_elements': [],
-            'popup_types': [],
-            'confidence': 0.0,
-            'recommendations': []
-        }
-
         # Check for overlays
         overlay_matches = []
         for pattern in self.overlay_patterns:
             matches = re.findall(pattern, html_content, re.IGNORECASE)
             overlay_matches.extend(matches)
 
-        analysis['has_overlay'] = len(overlay_matches) > 0
-        if analysis['has_overlay']:
-            analysis['popup_types'].append('overlay')
-            analysis['confidence'] += 0.4
-
         # Check for popups
         popup_matches = []
         for pattern in self.popup_patterns:
             matches = re.findall(pattern, html_content, re.IGNORECASE)
             popup_matches.extend(matches)
 
-        analysis['has_popup'] = len(popup_matches) > 0
-        if analysis['has_popup']:
-            analysis['popup_types'].append('modal')
-            analysis['confidence'] += 0.3
-
         # Check for multi-step indicators
         multi_step_matches = []
         for pattern in self.multi_step_patterns:
             matches = re.findall(pattern, html_content, re.IGNORECASE)
             multi_step_matches.extend(matches)
 
-        analysis['is_multi_step'] = len(multi_step_matches) > 0
-        if analysis['is_multi_step']:
-            analysis['popup_types'].append('guided_tour')
-            analysis['confidence'] += 0.2
-
         # Analyze layering (z-index and positioning)
         layer_matches = []
         for pattern in self.layer_patterns:
             matches = re.findall(pattern, html_content, re.IGNORECASE)
             layer_matches.extend(matches)
 
-        analysis['layer_count'] = len(set(layer_matches))  # Unique layers
+        return self._build_analysis({
+            'overlay_count': len(overlay_matches),
+            'popup_count': len(popup_matches),
+            'multi_step_count': len(multi_step_matches),
+            'layer_count': len(set(layer_matches)),  # Unique layers
+            'pointer_events_blocking': 'pointer-events: none' in html_content.lower(),
+        })
+
+    async def analyze_page(self, page) -> Dict[str, Any]:
+        """
+        Analyze the live page for popup structures without transferring its HTML.
+
+        Runs the same pattern matching as analyze_html inside the browser, so only
+        a handful of counters cross the CDP connection instead of the full DOM.
+
+        Returns:
+            dict: Analysis results with detection flags and metadata
+        """
+        raw = await page.evaluate(_ANALYZE_PAGE_JS, {
+            'overlay': self.overlay_patterns,
+            'popup': self.popup_patterns,
+            'multi_step': self.multi_step_patterns,
+            'layer': self.layer_patterns,
+        })
+        return self._build_analysis(raw)
+
+    @staticmethod
+    def _build_analysis(raw: Dict[str, Any]) -> Dict[str, Any]:
+        """Turn raw pattern-match counts into the analysis result structure"""
+        analysis = {
+            'has_popup': False,
+            'has_overlay': False,
+            'is_multi_step': False,
+            'layer_count': raw['layer_count'],
+            'blocking_elements': [],
+            'popup_types': [],
+            'confidence': 0.0,
+            'recommendations': []
+        }
+
+        analysis['has_overlay'] = raw['overlay_count'] > 0
+        if analysis['has_overlay']:
+            analysis['popup_types'].append('overlay')
+            analysis['confidence'] += 0.4
+
+        analysis['has_popup'] = raw['popup_count'] > 0
+        if analysis['has_popup']:
+            analysis['popup_types'].append('modal')
+            analysis['confidence'] += 0.3
+
+        analysis['is_multi_step'] = raw['multi_step_count'] > 0
+        if analysis['is_multi_step']:
+            analysis['popup_types'].append('guided_tour')
+            analysis['confidence'] += 0.2
 
         # Check for pointer-events blocking (common Football.com issue)
-        if 'pointer-events: none' in html_content.lower():
+        if raw['pointer_events_blocking']:
             analysis['blocking_elements'].append('pointer_events_blocking')
             analysis['confidence'] += 0.3
             analysis['recommendations'].append('force_dismissal')
@@ -138,11 +189,4 @@ class PopupDetector:
         Returns:
             str: Context identifier (fb_match_page, fb_general, etc.)
         """
-        url_lower = url.lower()
-
-        if 'football.com' in url_lower and ('match' in url_lower or 'game' in url_lower):
-            return 'fb_match_page'
-        elif 'football.com' in url_lower:
-            return 'fb_general'
-        else:
-            return 'generic'
+        return _detect_context_cached(url)
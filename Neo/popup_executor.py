@@ -5,12 +5,99 @@ Responsible for clicking selectors, force dismissal, and timeout management.
 """
 
 import asyncio
-from typing import Dict, Any, List, Optional
+import logging
+import sys
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+# Upper bound on remembered (host, selectors) -> winning selector entries
+_WINNER_CACHE_SIZE = 1024
+
+# Canonical method/action names shared by every result dict
+_M_STANDARD = sys.intern('standard')
+_M_FORCE = sys.intern('force_dismissal')
+_M_MULTI_STEP = sys.intern('multi_step')
+_A_JS_FORCE_CLICK = sys.intern('javascript_force_click')
+_A_ESCAPE_KEY = sys.intern('escape_key')
+_A_OUTSIDE_CLICK = sys.intern('outside_click')
+_A_BODY_CLICK = sys.intern('body_click')
+
+# Resolves on the next transitionend/animationend, or after a short idle when nothing animates
+_SETTLE_JS = """() => new Promise(resolve => {
+    const timer = setTimeout(resolve, 300);
+    const done = () => { clearTimeout(timer); resolve(); };
+    document.addEventListener('transitionend', done, {once: true});
+    document.addEventListener('animationend', done, {once: true});
+})"""
+
+# Returns [outerHTML length, 32-bit FNV-1a hash] so the DOM never crosses CDP in full
+_FINGERPRINT_JS = """() => {
+    const s = document.documentElement.outerHTML;
+    let h = 2166136261;
+    for (let i = 0; i < s.length; i++) h = Math.imul(h ^ s.charCodeAt(i), 16777619);
+    return [s.length, h >>> 0];
+}"""
+
+# Force-click through pointer-events blockers. :has-text() is Playwright-only and throws
+# inside the browser's CSS engine, so close buttons are matched on their text instead.
+_FORCE_CLICK_JS = """() => {
+    // Find all elements with pointer-events: none that might be blocking
+    const blockers = document.querySelectorAll('[style*="pointer-events: none"], .dialog-mask, .modal-backdrop');
+    const closeText = /^(close|ok|got it|dismiss)$/i;
+
+    for (const blocker of blockers) {
+        // Temporarily remove pointer-events blocking
+        blocker.style.pointerEvents = 'auto';
+
+        // Try to find close buttons underneath
+        const buttons = blocker.querySelectorAll('button, [role=button], [aria-label]');
+
+        for (const btn of buttons) {
+            const text = (btn.textContent || '').trim();
+            const label = (btn.getAttribute('aria-label') || '').trim();
+            if ((closeText.test(text) || closeText.test(label)) && btn.offsetParent !== null) { // Visible
+                btn.click();
+                return {success: true, selector: 'force_js_close', element: btn.outerHTML};
+            }
+        }
+    }
+
+    // Try overlay click
+    const overlays = document.querySelectorAll('.overlay, .backdrop, .mask');
+    for (const overlay of overlays) {
+        if (overlay.offsetParent !== null) {
+            overlay.click();
+            return {success: true, selector: 'force_overlay_click', element: overlay.outerHTML};
+        }
+    }
+
+    return {success: false, error: 'No force dismissal targets found'};
+}"""
+
+# Index of the first rendered, non-hidden element in a locator's match list (-1 if none)
+_FIRST_VISIBLE_JS = """els => els.findIndex(
+    e => e.offsetParent !== null && getComputedStyle(e).visibility !== 'hidden'
+)"""
+
+
+def _append_lazy(bucket: Optional[List[str]], item: str) -> List[str]:
+    """Append to a list that is only allocated on first use"""
+    if bucket is None:
+        bucket = []
+    bucket.append(item)
+    return bucket
 
 
 class PopupExecutor:
     """Executes popup dismissal operations with comprehensive error handling"""
 
+    # (context, selector tuple) -> selector that last dismissed a popup. Class-level so it
+    # survives the fresh PopupHandler/PopupExecutor built for every dismissal call.
+    _winning: "OrderedDict[Tuple[str, Tuple[str, ...]], str]" = OrderedDict()
+
     def __init__(self):
         self.default_timeout = 5000  # 5 seconds
         self.force_timeout = 10000   # 10 seconds for force operations
@@ -30,51 +117,47 @@ class PopupExecutor:
         Returns:
             dict: Execution results
         """
-        result = {
-            'success': False,
-            'selector_used': None,
-            'method': 'standard',
-            'selectors_tried': [],
-            'errors': [],
-            'context': context
-        }
-
         if not selectors:
-            result['error'] = 'No selectors provided'
-            return result
+            return {
+                'success': False,
+                'selector_used': None,
+                'method': _M_STANDARD,
+                'context': context,
+                'error': 'No selectors provided'
+            }
+
+        # Merged detector lists often repeat entries; each repeat would re-run a full wait
+        selectors = list(dict.fromkeys(selectors))
+
+        # Try the selector that won last time on this host first
+        cache_key = (urlparse(page.url).netloc, tuple(selectors))
+        winner = self._winning.get(cache_key)
+        if winner is not None and selectors[0] != winner:
+            selectors.remove(winner)
+            selectors.insert(0, winner)
 
         timeout = timeout or self.default_timeout
+        errors = None  # Built lazily, only once a selector fails
+        dom_changed = False  # Set once any click lands, so callers know cached HTML is stale
 
         for selector in selectors:
             try:
-                result['selectors_tried'].append(selector)
-
-                # Wait for element to be present
-                await page.wait_for_selector(selector, state='attached', timeout=timeout)
-
-                # Get element and check visibility
                 element = page.locator(selector).first
 
-                if await element.count() == 0:
-                    result['errors'].append(f"Selector not found: {selector}")
-                    continue
-
-                # Check if element is visible and enabled
-                is_visible = await element.is_visible()
-                is_enabled = await element.is_enabled()
-
-                if not is_visible:
-                    result['errors'].append(f"Selector not visible: {selector}")
+                # Non-throwing probe: an absent selector is the common case, not an exceptional one
+                if not await element.is_visible():
+                    errors = _append_lazy(errors, f"Selector not visible: {selector}")
                     continue
 
-                if not is_enabled:
-                    result['errors'].append(f"Selector not enabled: {selector}")
+                if not await element.is_enabled():
+                    errors = _append_lazy(errors, f"Selector not enabled: {selector}")
                     continue
 
                 # Attempt click
                 await element.click(timeout=timeout)
+                dom_changed = True
 
-                print(f"[Popup Executor] ✓ Successfully clicked: {selector}")
+                log.info("[Popup Executor] ✓ Successfully clicked: %s", selector)
 
                 # Verify dismissal by waiting a bit and checking if element still exists
                 await page.wait_for_timeout(500)
@@ -83,23 +166,39 @@ class PopupExecutor:
                 still_present = await element.count() > 0 and await element.is_visible()
 
                 if not still_present:
-                    result['success'] = True
-                    result['selector_used'] = selector
-                    break
-                else:
-                    result['errors'].append(f"Element still present after click: {selector}")
-                    # Continue to next selector since this one didn't work
+                    self._remember_winner(cache_key, selector)
+                    return {
+                        'success': True,
+                        'selector_used': selector,
+                        'method': _M_STANDARD,
+                        'context': context
+                    }
+
+                errors = _append_lazy(errors, f"Element still present after click: {selector}")
+                # Continue to next selector since this one didn't work
 
             except Exception as e:
-                error_msg = f"Failed to execute {selector}: {str(e)}"
-                result['errors'].append(error_msg)
-                print(f"[Popup Executor] Error: {error_msg}")
+                errors = _append_lazy(errors, f"Failed to execute {selector}: {str(e)}")
+                log.debug("[Popup Executor] Error: Failed to execute %s: %s", selector, e)
                 continue
 
-        if not result['success'] and result['selectors_tried']:
-            result['error'] = f"All {len(result['selectors_tried'])} selectors failed"
+        return {
+            'success': False,
+            'selector_used': None,
+            'method': _M_STANDARD,
+            'selectors_tried': list(selectors),
+            'errors': errors or [],
+            'context': context,
+            'dom_changed': dom_changed,
+            'error': f"All {len(selectors)} selectors failed"
+        }
 
-        return result
+    def _remember_winner(self, key: Tuple[str, Tuple[str, ...]], selector: str) -> None:
+        """Record the winning selector for a (host, selectors) pair, evicting the oldest entries"""
+        self._winning[key] = selector
+        self._winning.move_to_end(key)
+        while len(self._winning) > _WINNER_CACHE_SIZE:
+            self._winning.popitem(last=False)
 
     async def execute_force_dismissal(self, page, analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -114,63 +213,29 @@ class PopupExecutor:
         """
         result = {
             'success': False,
-            'method': 'force_dismissal',
-            'actions_taken': [],
-            'errors': []
+            'method': _M_FORCE
         }
+        errors = None  # Built lazily, only once an action fails
 
         try:
             # Check for pointer-events blocking (Football.com issue)
             if 'pointer_events_blocking' in analysis.get('blocking_elements', []):
-                print("[Force Dismissal] Detected pointer-events blocking, using JavaScript injection")
+                log.info("[Force Dismissal] Detected pointer-events blocking, using JavaScript injection")
 
                 # Inject JavaScript to force click through pointer-events: none
-                js_force_click = """
-                (function() {
-                    // Find all elements with pointer-events: none that might be blocking
-                    const blockers = document.querySelectorAll('[style*="pointer-events: none"], .dialog-mask, .modal-backdrop');
-
-                    for (let blocker of blockers) {
-                        // Temporarily remove pointer-events blocking
-                        blocker.style.pointerEvents = 'auto';
-
-                        // Try to find close buttons underneath
-                        const closeButtons = blocker.querySelectorAll('button:has-text("Close"), button:has-text("OK"), button:has-text("Got it"), [aria-label="Close"]');
-
-                        for (let btn of closeButtons) {
-                            if (btn.offsetParent !== null) { // Visible
-                                btn.click();
-                                return {success: true, selector: 'force_js_close', element: btn.outerHTML};
-                            }
-                        }
-                    }
-
-                    // Try overlay click
-                    const overlays = document.querySelectorAll('.overlay, .backdrop, .mask');
-                    for (let overlay of overlays) {
-                        if (overlay.offsetParent !== null) {
-                            overlay.click();
-                            return {success: true, selector: 'force_overlay_click', element: overlay.outerHTML};
-                        }
-                    }
-
-                    return {success: false, error: 'No force dismissal targets found'};
-                })();
-                """
-
-                force_result = await page.evaluate(js_force_click)
+                force_result = await page.evaluate(_FORCE_CLICK_JS)
 
                 if force_result and force_result.get('success'):
                     result['success'] = True
-                    result['actions_taken'].append('javascript_force_click')
+                    result['actions_taken'] = [_A_JS_FORCE_CLICK]
                     result['selector_used'] = force_result.get('selector', 'force_js')
-                    print(f"[Force Dismissal] ✓ JavaScript force click successful: {force_result.get('selector')}")
+                    log.info("[Force Dismissal] ✓ JavaScript force click successful: %s", force_result.get('selector'))
                 else:
-                    result['errors'].append('JavaScript force dismissal failed')
+                    errors = _append_lazy(errors, 'JavaScript force dismissal failed')
 
             # Try layered modal dismissal
             if analysis.get('layer_count', 0) > 1:
-                print(f"[Force Dismissal] Detected {analysis['layer_count']} layers, trying layered approach")
+                log.info("[Force Dismissal] Detected %s layers, trying layered approach", analysis['layer_count'])
 
                 # Get all potential modal elements
                 modal_selectors = [
@@ -185,46 +250,41 @@ class PopupExecutor:
                 for modal_sel in modal_selectors:
                     try:
                         modals = page.locator(modal_sel)
-                        count = await modals.count()
-
-                        if count > 0:
-                            # Try to dismiss each modal
-                            for i in range(count):
-                                modal = modals.nth(i)
-
-                                if await modal.is_visible():
-                                    # Try ESC key first
-                                    await page.keyboard.press('Escape')
-                                    await page.wait_for_timeout(500)
-
-                                    if not await modal.is_visible():
-                                        result['success'] = True
-                                        result['actions_taken'].append('escape_key')
-                                        result['selector_used'] = f'{modal_sel}[{i}]'
-                                        print(f"[Force Dismissal] ✓ ESC key dismissed modal: {modal_sel}[{i}]")
-                                        break
-
-                                    # Try clicking outside modal
-                                    await modal.click(position={'x': -10, 'y': -10})
-                                    await page.wait_for_timeout(500)
-
-                                    if not await modal.is_visible():
-                                        result['success'] = True
-                                        result['actions_taken'].append('outside_click')
-                                        result['selector_used'] = f'{modal_sel}[{i}]_outside'
-                                        print(f"[Force Dismissal] ✓ Outside click dismissed modal: {modal_sel}[{i}]")
-                                        break
-
-                            if result['success']:
+                        # One in-browser pass finds the first visible modal instead of count + N is_visible probes
+                        i = await modals.evaluate_all(_FIRST_VISIBLE_JS)
+
+                        if i >= 0:
+                            modal = modals.nth(i)
+
+                            # Try ESC key first
+                            await page.keyboard.press('Escape')
+                            await page.wait_for_timeout(500)
+
+                            if not await modal.is_visible():
+                                result['success'] = True
+                                result.setdefault('actions_taken', []).append(_A_ESCAPE_KEY)
+                                result['selector_used'] = f'{modal_sel}[{i}]'
+                                log.info("[Force Dismissal] ✓ ESC key dismissed modal: %s[%d]", modal_sel, i)
+                                break
+
+                            # Try clicking outside modal
+                            await modal.click(position={'x': -10, 'y': -10})
+                            await page.wait_for_timeout(500)
+
+                            if not await modal.is_visible():
+                                result['success'] = True
+                                result.setdefault('actions_taken', []).append(_A_OUTSIDE_CLICK)
+                                result['selector_used'] = f'{modal_sel}[{i}]_outside'
+                                log.info("[Force Dismissal] ✓ Outside click dismissed modal: %s[%d]", modal_sel, i)
                                 break
 
                     except Exception as e:
-                        result['errors'].append(f"Modal dismissal failed for {modal_sel}: {str(e)}")
+                        errors = _append_lazy(errors, f"Modal dismissal failed for {modal_sel}: {str(e)}")
                         continue
 
             # Final fallback: Try to click document body to dismiss overlays
             if not result['success']:
-                print("[Force Dismissal] Trying document body click as final fallback")
+                log.info("[Force Dismissal] Trying document body click as final fallback")
 
                 try:
                     await page.click('body', position={'x': 10, 'y': 10})
@@ -237,19 +297,21 @@ class PopupExecutor:
 
                     if overlays_gone:
                         result['success'] = True
-                        result['actions_taken'].append('body_click')
+                        result.setdefault('actions_taken', []).append(_A_BODY_CLICK)
                         result['selector_used'] = 'body_fallback'
-                        print("[Force Dismissal] ✓ Body click dismissed overlays")
+                        log.info("[Force Dismissal] ✓ Body click dismissed overlays")
                     else:
-                        result['errors'].append('Body click did not dismiss overlays')
+                        errors = _append_lazy(errors, 'Body click did not dismiss overlays')
 
                 except Exception as e:
-                    result['errors'].append(f"Body click failed: {str(e)}")
+                    errors = _append_lazy(errors, f"Body click failed: {str(e)}")
 
         except Exception as e:
-            result['errors'].append(f"Force dismissal execution error: {str(e)}")
+            errors = _append_lazy(errors, f"Force dismissal execution error: {str(e)}")
 
         if not result['success']:
+            result['actions_taken'] = result.get('actions_taken', [])
+            result['errors'] = errors or []
             result['error'] = f"Force dismissal failed after trying {len(result['actions_taken'])} methods"
 
         return result
@@ -269,11 +331,11 @@ class PopupExecutor:
         """
         result = {
             'success': False,
-            'method': 'multi_step',
+            'method': _M_MULTI_STEP,
             'steps_completed': 0,
-            'selectors_used': [],
-            'errors': []
+            'selectors_used': []
         }
+        errors = None  # Built lazily, only once a step fails
 
         if not selectors:
             result['error'] = 'No selectors provided for multi-step dismissal'
@@ -285,49 +347,64 @@ class PopupExecutor:
         try:
             for i, selector in enumerate(selectors_to_use):
                 try:
-                    # Wait for selector with increasing timeout
-                    timeout = min(self.default_timeout + (i * 1000), 15000)  # Up to 15s
-                    await page.wait_for_selector(selector, timeout=timeout)
-
                     element = page.locator(selector).first
 
-                    if await element.count() > 0 and await element.is_visible():
-                        await element.click(timeout=3000)
-                        result['selectors_used'].append(selector)
-                        result['steps_completed'] = i + 1
+                    # Fast path: step already on screen, skip the blocking wait
+                    if not await element.is_visible():
+                        # Wait for selector with increasing timeout (raises if it never shows)
+                        timeout = min(self.default_timeout + (i * 1000), 15000)  # Up to 15s
+                        await page.wait_for_selector(selector, timeout=timeout)
 
-                        print(f"[Multi-Step] ✓ Step {i+1}/{steps}: {selector}")
+                    await element.click(timeout=3000)
+                    result['selectors_used'].append(selector)
+                    result['steps_completed'] = i + 1
 
-                        # Wait between steps
-                        if i < steps - 1:
-                            await page.wait_for_timeout(1500)
-                    else:
-                        result['errors'].append(f"Step {i+1} selector not visible: {selector}")
-                        break
+                    log.info("[Multi-Step] ✓ Step %d/%d: %s", i + 1, steps, selector)
+
+                    # Wait between steps
+                    if i < steps - 1:
+                        await page.wait_for_timeout(1500)
 
                 except Exception as e:
-                    result['errors'].append(f"Step {i+1} failed ({selector}): {str(e)}")
+                    errors = _append_lazy(errors, f"Step {i+1} failed ({selector}): {str(e)}")
                     break
 
             # Success if we completed all intended steps
             result['success'] = result['steps_completed'] == steps
 
         except Exception as e:
-            result['errors'].append(f"Multi-step execution error: {str(e)}")
+            errors = _append_lazy(errors, f"Multi-step execution error: {str(e)}")
+
+        if errors:
+            result['errors'] = errors
 
         if not result['success'] and result['steps_completed'] > 0:
             result['partial_success'] = True
-            print(f"[Multi-Step] Partial success: {result['steps_completed']}/{steps} steps completed")
+            log.info("[Multi-Step] Partial success: %d/%d steps completed", result['steps_completed'], steps)
 
         return result
 
-    async def verify_dismissal(self, page, original_html: Optional[str] = None) -> Dict[str, Any]:
+    async def capture_fingerprint(self, page) -> Tuple[int, int]:
+        """
+        Capture a cheap (length, hash) fingerprint of the current DOM
+
+        Args:
+            page: Playwright page object
+
+        Returns:
+            tuple: (outerHTML length, 32-bit FNV-1a hash)
+        """
+        length, digest = await page.evaluate(_FINGERPRINT_JS)
+        return int(length), int(digest)
+
+    async def verify_dismissal(self, page,
+                               original_fingerprint: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
         """
         Verify that popup dismissal was successful
 
         Args:
             page: Playwright page object
-            original_html: HTML before dismissal attempt
+            original_fingerprint: DOM fingerprint from capture_fingerprint() before dismissal
 
         Returns:
             dict: Verification results
@@ -339,8 +416,8 @@ class PopupExecutor:
         }
 
         try:
-            # Wait for potential animations/transitions
-            await page.wait_for_timeout(1000)
+            # Wait for potential animations/transitions to settle (early exit when none run)
+            await page.evaluate(_SETTLE_JS)
 
             # Check 1: Are common popup selectors still present?
             popup_selectors = [
@@ -353,12 +430,8 @@ class PopupExecutor:
 
             popups_present = 0
             for selector in popup_selectors:
-                try:
-                    count = await page.locator(selector).count()
-                    if count > 0:
-                        popups_present += count
-                except:
-                    pass
+                # count() resolves to 0 for missing selectors, no exception handling needed
+                popups_present += await page.locator(selector).count()
 
             result['checks'].append({
                 'type': 'popup_selectors',
@@ -380,9 +453,14 @@ class PopupExecutor:
             })
 
             # Check 3: Has HTML changed significantly?
-            if original_html:
-                current_html = await page.content()
-                html_similarity = len(set(current_html.split()) & set(original_html.split())) / len(set(current_html.split()) | set(original_html.split()))
+            if original_fingerprint:
+                original_len, original_hash = original_fingerprint
+                current_len, current_hash = await self.capture_fingerprint(page)
+
+                if current_hash == original_hash and current_len == original_len:
+                    html_similarity = 1.0
+                else:
+                    html_similarity = min(current_len, original_len) / max(current_len, original_len, 1)
 
                 result['checks'].append({
                     'type': 'html_similarity',
@@ -5,13 +5,67 @@ Implements Phase 2 Football.com integration with intelligent popup resolution.
 """
 
 import asyncio
-from typing import Dict, Any, Optional
+import logging
+import time
+from functools import cached_property
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional, Tuple
 
 from .popup_detector import PopupDetector
 from .selector_manager import SelectorManager
 from .leo_popup_analyzer import LeoPopupAnalyzer
 from .popup_executor import PopupExecutor
 
+log = logging.getLogger(__name__)
+
+
+def _visible_union(*selectors: str) -> str:
+    """Join selectors into one Playwright selector list restricted to visible elements"""
+    return ', '.join(f'{selector}:visible' for selector in selectors)
+
+
+# Guided tour button candidates, and their unions built once so every probe sends an identical selector string
+_NEXT_SELECTORS = (
+    'button:has-text("Next")',
+    'span:has-text("Next")',
+    'button:has-text("Continue")',
+    'span:has-text("Continue")'
+)
+_GOT_IT_SELECTORS = (
+    'button:has-text("Got it")',
+    'button:has-text("Got it!")',
+    'span:has-text("Got it")',
+    'span:has-text("Got it!")'
+)
+_OK_SELECTORS = (
+    'button:has-text("OK")',
+    'button:has-text("Ok")',
+    'button:has-text("ok")',
+    'span:has-text("OK")',
+    'span:has-text("Ok")',
+    'span:has-text("ok")'
+)
+_NEXT_UNION = _visible_union(*_NEXT_SELECTORS)
+_GOT_IT_UNION = _visible_union(*_GOT_IT_SELECTORS)
+_OK_UNION = _visible_union(*_OK_SELECTORS)
+
+# Read-only legacy pattern table returned by PopupHandler.get_popup_patterns()
+_POPUP_PATTERNS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    "overlay_classes": (
+        "dialog-mask", "modal-backdrop", "overlay", "backdrop", "popup-overlay"
+    ),
+    "popup_wrappers": (
+        "m-popOver-wrapper", "popup-hint", "modal-dialog", "tooltip", "popover"
+    ),
+    "close_selectors": (
+        "button.close", '[data-dismiss="modal"]', 'button:has-text("Close")'
+    ),
+    "multi_step_indicators": (
+        "Next", "Got it", "Step", "Continue"
+    ),
+})
+
 
 class PopupHandler:
     """
@@ -28,15 +82,21 @@ class PopupHandler:
     def __init__(self):
         self.detector = PopupDetector()
         self.selector_manager = SelectorManager()
-        self.leo_analyzer = LeoPopupAnalyzer()  # Optional - requires API key
         self.executor = PopupExecutor()
 
+    @cached_property
+    def leo_analyzer(self) -> LeoPopupAnalyzer:
+        """AI popup analyzer, built on first use (only needed when a screenshot is supplied)"""
+        return LeoPopupAnalyzer()
+
     async def fb_universal_popup_dismissal(
         self,
         page,
         url: str = "",
         screenshot_path: Optional[str] = None,
         monitor_interval: int = 0,
+        *,
+        analysis: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
         """
         Universal popup dismissal with modular layered fallback strategy.
@@ -47,6 +107,7 @@ class PopupHandler:
             url: Page URL for context detection
             screenshot_path: Path to screenshot (optional, auto-captured if needed)
             monitor_interval: Seconds between checks (0 = single run)
+            analysis: Fresh popup analysis of the page, if the caller already has one
 
         Returns:
             dict: Dismissal result with method used and success status
@@ -71,33 +132,47 @@ class PopupHandler:
                 return result
 
             # Single dismissal attempt with layered fallback
-            dismissal_result = await self._execute_layered_dismissal(page, url, screenshot_path)
+            dismissal_result = await self._execute_layered_dismissal(
+                page, url, screenshot_path, context=result['context'], analysis=analysis
+            )
             result.update(dismissal_result)
 
             return result
 
         except Exception as e:
             result['error'] = f"Popup dismissal failed: {str(e)}"
-            print(f"[AI Pop-up] Critical error: {e}")
+            log.error("[AI Pop-up] Critical error: %s", e)
             return result
 
     async def _execute_layered_dismissal(
         self,
         page,
         url: str,
-        screenshot_path: Optional[str] = None
+        screenshot_path: Optional[str] = None,
+        *,
+        context: Optional[str] = None,
+        analysis: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Execute 5-step layered dismissal strategy
 
+        Args:
+            context: Page context already detected by the caller (detected from url if None)
+            analysis: Fresh popup analysis already computed by the caller (analyzed if None)
+
         Returns:
             dict: Result of dismissal attempt
         """
-        context = self.detector.detect_context(url)
+        if context is None:
+            context = self.detector.detect_context(url)
 
-        # Step 1: Analyze HTML content for popup structure
-        html_content = await page.content()
-        analysis = self.detector.analyze_html(html_content)
+        # Step 1: Analyze popup structure in-browser (only counters cross CDP, not the DOM)
+        if analysis is None:
+            analysis = await self.detector.analyze_page(page)
+
+        # Nothing popup-like on the page: skip probing ~20 selectors in the browser
+        if not (analysis.get('has_popup') or analysis.get('has_overlay') or analysis.get('is_multi_step')):
+            return {'success': True, 'method': 'no_popup_detected', 'selector_used': None}
 
         # Step 2: Get context-aware selectors
         selectors = self.selector_manager.get_all_popup_selectors(context)
@@ -107,18 +182,21 @@ class PopupHandler:
         is_guided_tour = (context == 'fb_match_page' and
                          (analysis.get('is_multi_step', False) or analysis.get('has_popup', False) or analysis.get('has_overlay', False)))
 
-        print(f"[AI Pop-up] Context: {context}, Has popup: {analysis.get('has_popup')}, Has overlay: {analysis.get('has_overlay')}, Multi-step: {analysis.get('is_multi_step')}, Guided tour: {is_guided_tour}")
+        log.debug("[AI Pop-up] Context: %s, Has popup: %s, Has overlay: %s, Multi-step: %s, Guided tour: %s", context, analysis.get('has_popup'), analysis.get('has_overlay'), analysis.get('is_multi_step'), is_guided_tour)
 
+        # A partly completed tour has already clicked through steps, so the analysis is stale
+        tour_changed_dom = False
         if is_guided_tour:
-            print("[AI Pop-up] 🎯 Detected Football.com guided tour - executing multi-step sequence")
+            log.info("[AI Pop-up] 🎯 Detected Football.com guided tour - executing multi-step sequence")
             tour_result = await self._execute_guided_tour_sequence(page, url)
             if tour_result['success']:
                 result = tour_result.copy()
                 result['method'] = 'guided_tour'
-                print("[AI Pop-up] ✓ Guided tour completed successfully")
+                log.info("[AI Pop-up] ✓ Guided tour completed successfully")
                 return result
             else:
-                print(f"[AI Pop-up] ⚠ Guided tour failed: {tour_result.get('errors', [])}")
+                log.info("[AI Pop-up] ⚠ Guided tour failed: %s", tour_result.get('errors', []))
+                tour_changed_dom = bool(tour_result.get('steps_completed'))
 
         # Step 3b: Try standard dismissal first (for non-guided-tour popups)
         dismissal_result = await self.executor.execute_dismissal(page, selectors, context)
@@ -127,12 +205,16 @@ class PopupHandler:
             result = dismissal_result.copy()
             result['method'] = 'standard'
             self._update_knowledge(url, dismissal_result['selector_used'], context)
-            print(f"[AI Pop-up] ✓ Closed popup via standard method: {dismissal_result['selector_used']}")
+            log.info("[AI Pop-up] ✓ Closed popup via standard method: %s", dismissal_result['selector_used'])
             return result
 
+        # Only re-analyse the page once a dismissal attempt has actually touched the DOM
+        dom_changed = dismissal_result.get('dom_changed', False) or tour_changed_dom
+
         # Step 3: If standard fails and we have screenshot, try AI analysis
         if screenshot_path and self.leo_analyzer:
-            print("[AI Pop-up] Standard dismissal failed, trying AI analysis...")
+            log.info("[AI Pop-up] Standard dismissal failed, trying AI analysis...")
+            # The AI prompt needs the markup itself, so this is the one place the DOM is transferred
             ai_analysis = await self.leo_analyzer.analyze_popup(page, await page.content(), screenshot_path, context)
             if ai_analysis.get('has_popup', False) and ai_analysis.get('selectors', []):
                 ai_result = await self.leo_analyzer.execute_ai_dismissal(page, ai_analysis)
@@ -140,33 +222,40 @@ class PopupHandler:
                     result = ai_result.copy()
                     result['method'] = 'ai_analysis'
                     return result
+                dom_changed = True
 
         # Step 4: Try force dismissal for layered popups
-        print("[AI Pop-up] Trying force dismissal...")
-        html_content = await page.content()
-        analysis = self.detector.analyze_html(html_content)
+        log.info("[AI Pop-up] Trying force dismissal...")
+        if dom_changed:
+            analysis = await self.detector.analyze_page(page)
 
         if analysis['layer_count'] > 1 or 'pointer_events_blocking' in analysis.get('blocking_elements', []):
             force_result = await self.executor.execute_force_dismissal(page, analysis)
             if force_result['success']:
                 result = force_result.copy()
                 result['method'] = 'force_dismissal'
-                print("[AI Pop-up] ✓ Force dismissal successful")
+                log.info("[AI Pop-up] ✓ Force dismissal successful")
                 return result
 
-        # Step 5: Final fallback - try all known selectors
-        print("[AI Pop-up] Attempting comprehensive dismissal...")
-        all_selectors = self.selector_manager.get_popup_selectors(context)
-        comprehensive_result = await self.executor.execute_dismissal(page, all_selectors, context)
+        # Step 5: Final fallback - known selectors Step 3b has not already tried.
+        # Step 3b ran learned + predefined selectors, so this is usually empty.
+        tried = set(dismissal_result.get('selectors_tried', ()))
+        all_selectors = [s for s in self.selector_manager.get_popup_selectors(context) if s not in tried]
+
+        if all_selectors:
+            log.info("[AI Pop-up] Attempting comprehensive dismissal...")
+            comprehensive_result = await self.executor.execute_dismissal(page, all_selectors, context)
+        else:
+            comprehensive_result = dismissal_result
 
         result = comprehensive_result.copy()
         result['method'] = 'comprehensive'
 
         if comprehensive_result['success']:
-            print(f"[AI Pop-up] ✓ Comprehensive dismissal successful: {comprehensive_result['selector_used']}")
+            log.info("[AI Pop-up] ✓ Comprehensive dismissal successful: %s", comprehensive_result['selector_used'])
             self._update_knowledge(url, comprehensive_result['selector_used'], context)
         else:
-            print(f"[AI Pop-up] All dismissal methods failed: {comprehensive_result.get('error', 'Unknown error')}")
+            log.info("[AI Pop-up] All dismissal methods failed: %s", comprehensive_result.get('error', 'Unknown error'))
 
         return result
 
@@ -181,35 +270,36 @@ class PopupHandler:
             interval: Monitoring interval in seconds
         """
         monitoring_active = True
-        print(f"[AI Pop-up] Continuous monitoring every {interval}s...")
+        log.info("[AI Pop-up] Continuous monitoring every %ss...", interval)
 
         try:
             while monitoring_active:
                 try:
                     # Quick check for popups
-                    html_content = await page.content()
-                    analysis = self.detector.analyze_html(html_content)
+                    analysis = await self.detector.analyze_page(page)
 
                     if analysis['has_popup'] or analysis['has_overlay']:
-                        print(f"[AI Pop-up] Detected: Overlay={analysis['has_overlay']}, Popup={analysis['has_popup']}, Multi={analysis['is_multi_step']}")
+                        log.info("[AI Pop-up] Detected: Overlay=%s, Popup=%s, Multi=%s", analysis['has_overlay'], analysis['has_popup'], analysis['is_multi_step'])
 
-                        # Take screenshot for AI analysis if needed
+                        # Take screenshot for AI analysis only when there is a popup to analyze
                         screenshot_path = await self._take_screenshot(page, "monitoring")
 
-                        result = await self.fb_universal_popup_dismissal(page, url, screenshot_path)
+                        result = await self.fb_universal_popup_dismissal(
+                            page, url, screenshot_path, analysis=analysis
+                        )
 
                         if result['success']:
-                            print(f"[AI Pop-up] ✓ Closed popup via {result.get('method', 'unknown')}: {result.get('selector_used', 'N/A')}")
+                            log.info("[AI Pop-up] ✓ Closed popup via %s: %s", result.get('method', 'unknown'), result.get('selector_used', 'N/A'))
                         else:
-                            print(f"[AI Pop-up] Attempt failed: {result.get('error', 'Unknown error')}")
+                            log.info("[AI Pop-up] Attempt failed: %s", result.get('error', 'Unknown error'))
 
                 except Exception as e:
-                    print(f"[AI Pop-up] Monitoring error: {e}")
+                    log.warning("[AI Pop-up] Monitoring error: %s", e)
 
                 await asyncio.sleep(interval)
 
         except asyncio.CancelledError:
-            print("[AI Pop-up] Monitoring cancelled")
+            log.info("[AI Pop-up] Monitoring cancelled")
 
     def _update_knowledge(self, url: str, selector: str, context: str) -> None:
         """Update knowledge base with successful dismissal"""
@@ -237,142 +327,116 @@ class PopupHandler:
 
         try:
             # Step 1: Click "Next" button
-            print("[Guided Tour] Step 1: Looking for 'Next' button...")
-            next_selectors = [
-                'button:has-text("Next")',
-                'span:has-text("Next")',
-                'button:has-text("Continue")',
-                'span:has-text("Continue")'
-            ]
-
-            next_clicked = False
-            for selector in next_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if await element.count() > 0 and await element.is_visible():
-                        await element.click(timeout=3000)
-                        result['selectors_used'].append(selector)
-                        result['steps_completed'] = 1
-                        next_clicked = True
-                        print(f"[Guided Tour] ✓ Step 1 completed: clicked {selector}")
-                        break
-                except Exception as e:
-                    continue
-
+            log.debug("[Guided Tour] Step 1: Looking for 'Next' button...")
+            next_clicked = await self._click_first_visible(page, _NEXT_UNION, _NEXT_SELECTORS)
             if not next_clicked:
                 result['errors'].append("Could not find 'Next' button")
                 return result
 
+            result['selectors_used'].append(next_clicked)
+            result['steps_completed'] = 1
+            log.info("[Guided Tour] ✓ Step 1 completed: clicked %s", next_clicked)
+
             # Wait for transition
             await page.wait_for_timeout(1500)
 
             # Step 2: Click "Got it" button
-            print("[Guided Tour] Step 2: Looking for 'Got it' button...")
-            got_it_selectors = [
-                'button:has-text("Got it")',
-                'button:has-text("Got it!")',
-                'span:has-text("Got it")',
-                'span:has-text("Got it!")'
-            ]
-
-            got_it_clicked = False
-            for selector in got_it_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if await element.count() > 0 and await element.is_visible():
-                        await element.click(timeout=3000)
-                        result['selectors_used'].append(selector)
-                        result['steps_completed'] = 2
-                        got_it_clicked = True
-                        print(f"[Guided Tour] ✓ Step 2 completed: clicked {selector}")
-                        break
-                except Exception as e:
-                    continue
-
+            log.debug("[Guided Tour] Step 2: Looking for 'Got it' button...")
+            got_it_clicked = await self._click_first_visible(page, _GOT_IT_UNION, _GOT_IT_SELECTORS)
             if not got_it_clicked:
                 result['errors'].append("Could not find 'Got it' button")
                 return result
 
+            result['selectors_used'].append(got_it_clicked)
+            result['steps_completed'] = 2
+            log.info("[Guided Tour] ✓ Step 2 completed: clicked %s", got_it_clicked)
+
             # Step 3: Wait for the final popup to appear (user mentioned "few seconds later")
-            print("[Guided Tour] Step 3: Waiting for final OK popup...")
-            await page.wait_for_timeout(30000)  # Wait 5 seconds for the OK popup to appear
+            log.info("[Guided Tour] Step 3: Waiting for final OK popup...")
+            try:
+                # Returns as soon as the OK button shows, up to 30 seconds
+                await page.wait_for_selector(_OK_UNION, state='visible', timeout=30000)
+            except Exception:
+                pass  # Step 4 reports the missing button
 
             # Step 4: Click OK button
-            print("[Guided Tour] Step 4: Looking for OK button...")
-            ok_selectors = [
-                'button:has-text("OK")',
-                'button:has-text("Ok")',
-                'button:has-text("ok")',
-                'span:has-text("OK")',
-                'span:has-text("Ok")',
-                'span:has-text("ok")'
-            ]
-
-            ok_clicked = False
-            for selector in ok_selectors:
-                try:
-                    element = page.locator(selector).first
-                    if await element.count() > 0 and await element.is_visible():
-                        await element.click(timeout=3000)
-                        result['selectors_used'].append(selector)
-                        result['steps_completed'] = 4
-                        ok_clicked = True
-                        print(f"[Guided Tour] ✓ Step 4 completed: clicked {selector}")
-                        break
-                except Exception as e:
-                    continue
-
+            log.debug("[Guided Tour] Step 4: Looking for OK button...")
+            ok_clicked = await self._click_first_visible(page, _OK_UNION, _OK_SELECTORS)
             if not ok_clicked:
                 result['errors'].append("Could not find OK button")
                 return result
 
+            result['selectors_used'].append(ok_clicked)
+            result['steps_completed'] = 4
+            log.info("[Guided Tour] ✓ Step 4 completed: clicked %s", ok_clicked)
+
             # Verify tour completion by checking if popups are gone
             await page.wait_for_timeout(1000)
             verification = await self.executor.verify_dismissal(page)
 
             if verification['dismissed']:
                 result['success'] = True
-                print("[Guided Tour] ✓ Tour completed and verified - all popups dismissed")
+                log.info("[Guided Tour] ✓ Tour completed and verified - all popups dismissed")
             else:
                 result['errors'].append("Tour steps completed but popups still present")
-                print("[Guided Tour] ⚠ Tour steps completed but verification failed")
+                log.info("[Guided Tour] ⚠ Tour steps completed but verification failed")
 
         except Exception as e:
             result['errors'].append(f"Tour execution failed: {str(e)}")
-            print(f"[Guided Tour] Error: {e}")
+            log.warning("[Guided Tour] Error: %s", e)
 
         return result
 
+    async def _click_first_visible(self, page, union: str, candidates: Tuple[str, ...],
+                                   timeout: int = 3000) -> Optional[str]:
+        """
+        Click the first visible match of a compiled selector union instead of a
+        count/is_visible/click round-trip per candidate.
+
+        Returns:
+            str: The candidate selector that matched the clicked element, or None if nothing became visible
+        """
+        element = page.locator(union).first
+        try:
+            await element.wait_for(state='visible', timeout=timeout)
+            # Resolve which candidate the element came from before the click removes it
+            hits = await asyncio.gather(*(element.and_(page.locator(c)).count() for c in candidates))
+            await element.click(timeout=timeout)
+            return next((c for c, hit in zip(candidates, hits) if hit), union)
+        except Exception:
+            return None
+
     async def _take_screenshot(self, page, prefix: str = "popup") -> str:
         """Take screenshot for analysis"""
-        import time
-        timestamp = int(time.time())
-        screenshot_path = f"Logs/popup_{prefix}_{timestamp}.png"
+        return self._save_screenshot(await self._capture_screenshot(page), prefix)
 
+    async def _capture_screenshot(self, page) -> bytes:
+        """Capture a full-page screenshot in memory (empty on failure)"""
         try:
-            await page.screenshot(path=screenshot_path, full_page=True)
-            return screenshot_path
+            return await page.screenshot(full_page=True)
         except Exception as e:
-            print(f"[AI Pop-up] Screenshot failed: {e}")
+            log.warning("[AI Pop-up] Screenshot failed: %s", e)
+            return b""
+
+    def _save_screenshot(self, data: bytes, prefix: str = "popup") -> str:
+        """Write captured screenshot bytes under Logs/ and return the path ('' if nothing captured)"""
+        if not data:
+            return ""
+
+        timestamp = int(time.time())
+        screenshot_path = Path(f"Logs/popup_{prefix}_{timestamp}.png")
+
+        try:
+            screenshot_path.parent.mkdir(parents=True, exist_ok=True)
+            screenshot_path.write_bytes(data)
+            return str(screenshot_path)
+        except OSError as e:
+            log.warning("[AI Pop-up] Screenshot failed: %s", e)
             return ""
 
     # ===== LEGACY COMPATIBILITY METHODS =====
 
     @staticmethod
-    def get_popup_patterns() -> dict:
+    def get_popup_patterns() -> Mapping[str, Tuple[str, ...]]:
         """Legacy method - use PopupDetector instead"""
-        detector = PopupDetector()
-        return {
-            "overlay_classes": [
-                "dialog-mask", "modal-backdrop", "overlay", "backdrop", "popup-overlay"
-            ],
-            "popup_wrappers": [
-                "m-popOver-wrapper", "popup-hint", "modal-dialog", "tooltip", "popover"
-            ],
-            "close_selectors": [
-                "button.close", '[data-dismiss="modal"]', 'button:has-text("Close")'
-            ],
-            "multi_step_indicators": [
-                "Next", "Got it", "Step", "Continue"
-            ],
-        }
+        return _POPUP_PATTERNS
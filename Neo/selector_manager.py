@@ -15,18 +15,161 @@ USAGE PATTERNS:
 """
 
 import os
-from typing import Dict, Any, Optional
-
-from Helpers.Neo_Helpers.Managers.db_manager import load_knowledge, save_knowledge, knowledge_db
+import re
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Any, Optional, Tuple
+
+from Helpers.Neo_Helpers.Managers.db_manager import load_knowledge, save_knowledge, schedule_save_knowledge, knowledge_db
+
+
+# Phase 2: Football.com match page priority selectors - GUIDED TOUR SEQUENCE
+_FB_MATCH_SELECTORS: Tuple[str, ...] = (
+    # Step 1: Next button for guided tour
+    'button:has-text("Next")',
+    'span:has-text("Next")',
+    'button:has-text("Continue")',
+    'span:has-text("Continue")',
+
+    # Step 2: Got it completion buttons
+    'button:has-text("Got it")',
+    'button:has-text("Got it!")',
+    'span:has-text("Got it")',
+    'span:has-text("Got it!")',
+
+    # Step 3: OK dismissal buttons (appears after tour)
+    'button:has-text("OK")',
+    'button:has-text("Ok")',
+    'button:has-text("ok")',
+    'span:has-text("OK")',
+    'span:has-text("Ok")',
+    'span:has-text("ok")',
+
+    # Fallback close buttons
+    'button:has-text("Skip")',
+    'button:has-text("End Tour")',
+    'button:has-text("Dismiss")',
+    'button:has-text("Close")',
+    'svg.close-circle-icon',
+    'button.close',
+    '[data-dismiss="modal"]',
+    'svg[aria-label="Close"]',
+    'button[aria-label="Close"]',
+)
+
+# Football.com general pages
+_FB_GENERAL_SELECTORS: Tuple[str, ...] = (
+    'button:has-text("Got it")',
+    'button:has-text("OK")',
+    'button:has-text("ok")',
+    'button:has-text("Skip")',
+    'button:has-text("End Tour")',
+    'button:has-text("Dismiss")',
+    'button:has-text("Close")',
+    'svg.close-circle-icon',
+    'button.close',
+    '[data-dismiss="modal"]',
+    'svg[aria-label="Close"]',
+    'button[aria-label="Close"]',
+    'button:has-text("Next")',
+    'span:has-text("Next")',
+)
+
+# Generic fallback selectors
+_GENERIC_SELECTORS: Tuple[str, ...] = (
+    'button:has-text("Close")',
+    'button:has-text("OK")',
+    'button:has-text("Dismiss")',
+    'button:has-text("Skip")',
+    'button:has-text("Got it")',
+    '[data-dismiss="modal"]',
+    'svg[aria-label="Close"]',
+    'button[aria-label="Close"]',
+    'button.close',
+    'svg.close-circle-icon',
+    '.close',
+    '[aria-label="Close"]',
+)
+
+
+@lru_cache(maxsize=32)
+def _combine(context: str, learned_key: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Learned selectors first, then predefined ones, de-duplicated in order"""
+    return tuple(dict.fromkeys(learned_key + SelectorManager.get_popup_selectors(context)))
+
+
+# Key under each context holding learned popup selectors, most recent first
+_LEARNED_POPUPS_KEY = '__learned_popups__'
+_LEARNED_POPUPS_LIMIT = 50
+_LEGACY_POPUP_PREFIX = 'popup_close_'
+
+
+def _learned_popups(context: str) -> deque:
+    """
+    Return the bounded deque of learned popup selectors for a context, creating it
+    (and folding in legacy popup_close_<timestamp> entries) on first access.
+    """
+    context_db = knowledge_db.setdefault(context, {})
+    learned = context_db.get(_LEARNED_POPUPS_KEY)
+    if isinstance(learned, deque):
+        return learned
+
+    # Loaded from JSON as a list (or missing): rebuild the bounded deque once
+    learned = deque(learned or (), maxlen=_LEARNED_POPUPS_LIMIT)
+    legacy_keys = sorted(
+        (k for k in context_db if k.startswith(_LEGACY_POPUP_PREFIX)),
+        key=lambda k: int(k.rsplit('_', 1)[-1])
+    )
+    for key in legacy_keys:
+        learned.appendleft(context_db.pop(key))
+
+    context_db[_LEARNED_POPUPS_KEY] = learned
+    return learned
+
+
+# Obviously invalid selector patterns, matched case-insensitively in a single pass:
+# non-standard jQuery :contains(), and skeleton/loading-state selectors
+_INVALID_SELECTOR_RE = re.compile(r':contains\(|skeleton|ska__', re.I)
+
+_FB_RE = re.compile(r'football\.com', re.I)
+_FB_MATCH_RE = re.compile(r'match|game', re.I)
+
+
+@lru_cache(maxsize=1024)
+def _detect_context_cached(url: str) -> str:
+    """Detect popup context from URL (memoized per URL)"""
+    if _FB_RE.search(url):
+        if _FB_MATCH_RE.search(url):
+            return 'fb_match_page'
+        return 'fb_general'
+    return 'generic'
 
 
 class SelectorManager:
     """Manages CSS selectors for web automation with auto-healing capabilities"""
 
+    # (context_key, element_key) -> (selector, monotonic time it was last seen on a page)
+    _validation_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+    VALIDATION_TTL = 30.0  # seconds a successful on-page validation is trusted
+
+    @classmethod
+    def is_recently_validated(cls, context_key: str, element_key: str, selector: str) -> bool:
+        """True if this exact selector was validated on a page within VALIDATION_TTL seconds."""
+        cached = cls._validation_cache.get((context_key, element_key))
+        return (cached is not None and cached[0] == selector
+                and time.monotonic() - cached[1] < cls.VALIDATION_TTL)
+
+    @classmethod
+    def mark_validated(cls, context_key: str, element_key: str, selector: str) -> None:
+        """Record a successful on-page validation of a selector."""
+        cls._validation_cache[(context_key, element_key)] = (selector, time.monotonic())
+
     @staticmethod
     def get_selector(context: str, element_key: str) -> str:
         """Legacy synchronous accessor (does not auto-heal)."""
-        return knowledge_db.get(context, {}).get(element_key, "")
+        context_db = knowledge_db.get(context)
+        return context_db.get(element_key, "") if context_db else ""
 
     @staticmethod
     async def get_selector_auto(page, context_key: str, element_key: str) -> str:
@@ -36,7 +179,8 @@ class SelectorManager:
         Auto-healing only occurs when selectors are actually used and fail.
         """
         # Simple lookup - no validation, no healing
-        selector = knowledge_db.get(context_key, {}).get(element_key, "")
+        context_db = knowledge_db.get(context_key)
+        selector = context_db.get(element_key, "") if context_db else ""
         return str(selector)
 
     @staticmethod
@@ -66,7 +210,8 @@ class SelectorManager:
             await analyze_page_and_update_selectors(page, context_key, force_refresh=True, info=info)
 
             # Return the healed selector
-            healed_selector = knowledge_db.get(context_key, {}).get(element_key, "")
+            context_db = knowledge_db.get(context_key)
+            healed_selector = context_db.get(element_key, "") if context_db else ""
             if healed_selector:
                 print(f"    [Heal Success] New selector for '{element_key}': {healed_selector}")
                 return str(healed_selector)
@@ -91,24 +236,23 @@ class SelectorManager:
     @staticmethod
     def update_selector(context: str, key: str, selector: str):
         """Update a specific selector in the knowledge base"""
-        if context not in knowledge_db:
-            knowledge_db[context] = {}
-        knowledge_db[context][key] = selector
-        save_knowledge()
+        knowledge_db.setdefault(context, {})[key] = selector
+        schedule_save_knowledge()
 
     @staticmethod
     def remove_selector(context: str, key: str):
         """Remove a specific selector from the knowledge base"""
-        if context in knowledge_db and key in knowledge_db[context]:
-            del knowledge_db[context][key]
-            save_knowledge()
+        context_db = knowledge_db.get(context)
+        if context_db and key in context_db:
+            del context_db[key]
+            schedule_save_knowledge()
 
     @staticmethod
     def clear_context_selectors(context: str):
         """Clear all selectors for a specific context"""
         if context in knowledge_db:
             knowledge_db[context] = {}
-            save_knowledge()
+            schedule_save_knowledge()
 
     @staticmethod
     def get_contexts_list() -> list:
@@ -122,22 +266,12 @@ class SelectorManager:
             return False
 
         # Check for obviously invalid patterns
-        invalid_patterns = [
-            ':contains(',  # Non-standard jQuery selector
-            'skeleton',    # Loading state selectors
-            'ska__',       # Skeleton loading selectors
-        ]
-
-        for pattern in invalid_patterns:
-            if pattern in selector.lower():
-                return False
-
-        return True
+        return not _INVALID_SELECTOR_RE.search(selector)
 
     # ===== POPUP-SPECIFIC SELECTOR MANAGEMENT =====
 
     @staticmethod
-    def get_popup_selectors(context: str) -> list:
+    def get_popup_selectors(context: str) -> Tuple[str, ...]:
         """
         Get context-aware popup dismissal selectors with Phase 2 priority
 
@@ -145,78 +279,14 @@ class SelectorManager:
             context: Page context (fb_match_page, fb_general, generic)
 
         Returns:
-            list: Ordered list of selectors (priority first)
+            tuple: Ordered selectors (priority first)
         """
-        # Phase 2: Football.com match page priority selectors - GUIDED TOUR SEQUENCE
         if context == 'fb_match_page':
-            return [
-                # Step 1: Next button for guided tour
-                'button:has-text("Next")',
-                'span:has-text("Next")',
-                'button:has-text("Continue")',
-                'span:has-text("Continue")',
-
-                # Step 2: Got it completion buttons
-                'button:has-text("Got it")',
-                'button:has-text("Got it!")',
-                'span:has-text("Got it")',
-                'span:has-text("Got it!")',
-
-                # Step 3: OK dismissal buttons (appears after tour)
-                'button:has-text("OK")',
-                'button:has-text("Ok")',
-                'button:has-text("ok")',
-                'span:has-text("OK")',
-                'span:has-text("Ok")',
-                'span:has-text("ok")',
-
-                # Fallback close buttons
-                'button:has-text("Skip")',
-                'button:has-text("End Tour")',
-                'button:has-text("Dismiss")',
-                'button:has-text("Close")',
-                'svg.close-circle-icon',
-                'button.close',
-                '[data-dismiss="modal"]',
-                'svg[aria-label="Close"]',
-                'button[aria-label="Close"]',
-            ]
-
-        # Football.com general pages
+            return _FB_MATCH_SELECTORS
         elif context == 'fb_general':
-            return [
-                'button:has-text("Got it")',
-                'button:has-text("OK")',
-                'button:has-text("ok")',
-                'button:has-text("Skip")',
-                'button:has-text("End Tour")',
-                'button:has-text("Dismiss")',
-                'button:has-text("Close")',
-                'svg.close-circle-icon',
-                'button.close',
-                '[data-dismiss="modal"]',
-                'svg[aria-label="Close"]',
-                'button[aria-label="Close"]',
-                'button:has-text("Next")',
-                'span:has-text("Next")',
-            ]
-
-        # Generic fallback selectors
+            return _FB_GENERAL_SELECTORS
         else:
-            return [
-                'button:has-text("Close")',
-                'button:has-text("OK")',
-                'button:has-text("Dismiss")',
-                'button:has-text("Skip")',
-                'button:has-text("Got it")',
-                '[data-dismiss="modal"]',
-                'svg[aria-label="Close"]',
-                'button[aria-label="Close"]',
-                'button.close',
-                'svg.close-circle-icon',
-                '.close',
-                '[aria-label="Close"]',
-            ]
+            return _GENERIC_SELECTORS
 
     @staticmethod
     def learn_successful_selector(url: str, selector: str, context: Optional[str] = None):
@@ -231,23 +301,16 @@ class SelectorManager:
         if not context:
             context = SelectorManager._detect_context_from_url(url)
 
-        # Update context-specific knowledge
-        if context not in knowledge_db:
-            knowledge_db[context] = {}
+        learned = _learned_popups(context)
 
-        # Store successful selector with timestamp
-        import time
-        knowledge_db[context][f'popup_close_{int(time.time())}'] = selector
+        # Same selector winning again on a stable site: nothing new to persist
+        if learned and learned[0] == selector:
+            return
 
-        # Keep only recent successful selectors (last 50)
-        popup_keys = [k for k in knowledge_db[context].keys() if k.startswith('popup_close_')]
-        if len(popup_keys) > 50:
-            # Remove oldest entries
-            sorted_keys = sorted(popup_keys, key=lambda x: int(x.split('_')[-1]))
-            for old_key in sorted_keys[:-50]:
-                del knowledge_db[context][old_key]
+        # Most recent first; the deque evicts the oldest beyond the last 50
+        learned.appendleft(selector)
 
-        save_knowledge()
+        schedule_save_knowledge()
         print(f"[Selector Learning] Learned successful selector: {selector} for {context}")
 
     @staticmethod
@@ -264,28 +327,15 @@ class SelectorManager:
         if context not in knowledge_db:
             return []
 
-        popup_selectors = {}
-        for key, selector in knowledge_db[context].items():
-            if key.startswith('popup_close_'):
-                timestamp = int(key.split('_')[-1])
-                popup_selectors[timestamp] = selector
-
-        # Return most recent selectors first
-        return [popup_selectors[ts] for ts in sorted(popup_selectors.keys(), reverse=True)]
+        return list(_learned_popups(context))
 
     @staticmethod
     def _detect_context_from_url(url: str) -> str:
         """Detect context from URL"""
-        url_lower = url.lower()
-        if 'football.com' in url_lower:
-            if 'match' in url_lower or 'game' in url_lower:
-                return 'fb_match_page'
-            else:
-                return 'fb_general'
-        return 'generic'
+        return _detect_context_cached(url)
 
     @staticmethod
-    def get_all_popup_selectors(context: str) -> list:
+    def get_all_popup_selectors(context: str) -> Tuple[str, ...]:
         """
         Get complete list of popup selectors: learned + predefined
 
@@ -293,18 +343,7 @@ class SelectorManager:
             context: Page context
 
         Returns:
-            list: Combined selectors with learned ones prioritized
+            tuple: Combined selectors with learned ones prioritized
         """
-        learned = SelectorManager.get_learned_selectors(context)
-        predefined = SelectorManager.get_popup_selectors(context)
-
-        # Remove duplicates while preserving order (learned first)
-        combined = learned + predefined
-        seen = set()
-        result = []
-        for selector in combined:
-            if selector not in seen:
-                seen.add(selector)
-                result.append(selector)
-
-        return result
+        learned = tuple(SelectorManager.get_learned_selectors(context))
+        return _combine(context, learned)
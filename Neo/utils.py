@@ -3,8 +3,15 @@ Neo Utils Module
 Utility functions for the Neo package.
 """
 
+import json
 import re
 
+# Patterns and tables used by clean_json_response, built once at import
+_RE_FENCES = re.compile(r"^```\w*\s*|```$", re.MULTILINE)
+_RE_BAD_ESCAPE = re.compile(r'\\(?!["\\/bfnrtu])')
+_RE_SELECTOR_QUOTES = re.compile(r'("selector"\s*:\s*"[^"]*)"([^"]*)"([^"]*")')
+_CTRL_DELETE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+
 
 def clean_json_response(text: str) -> str:
     """
@@ -14,60 +21,86 @@ def clean_json_response(text: str) -> str:
     if not text:
         return "{}"
 
-    # 1. Remove Markdown code blocks
-    text = re.sub(r"^```json\s*", "", text, flags=re.MULTILINE)
-    text = re.sub(r"^```\s*", "", text, flags=re.MULTILINE)
-    text = re.sub(r"```$", "", text, flags=re.MULTILINE)
+    # 1-2. Remove Markdown code fences (```json, ```lang, bare and trailing ```)
+    # The common shape is one leading and one trailing fence, which plain
+    # slicing handles; the regex only runs if a stray fence is left over.
+    text = text.strip()
+    if text.startswith("```"):
+        newline = text.find("\n")
+        tag = text[3:newline] if newline != -1 else ""
+        if newline != -1 and (not tag.strip() or tag.strip().isalnum()):
+            text = text[newline + 1:]
+    if text.endswith("```"):
+        text = text[:-3]
+    if "```" in text:
+        text = _RE_FENCES.sub("", text)
+    text = text.strip()
 
-    # 2. Remove any remaining markdown formatting
-    text = re.sub(r"^```\w*\s*", "", text, flags=re.MULTILINE)
+    # Well-formed replies need no repair; one parse is far cheaper than the
+    # passes below (which would also mangle already-valid escapes)
+    if text.startswith(('{', '[')):
+        try:
+            json.loads(text)
+            return text
+        except ValueError:
+            pass
 
     # 3. Handle truncated JSON first (before other processing)
-    text = text.strip()
-    if text.count('{') > text.count('}') and not text.endswith('}'):
+    # Later steps never add or remove an unpaired brace or bracket, so the
+    # counts taken here are reused for the final balance check in step 9.
+    # Only a surplus of openers matters, so closers are counted only when
+    # there are openers to balance.
+    brace_count = text.count('{')
+    if brace_count:
+        brace_count -= text.count('}')
+    bracket_count = text.count('[')
+    if bracket_count:
+        bracket_count -= text.count(']')
+    if brace_count > 0 and not text.endswith('}'):
         # Try to close the JSON if it's incomplete
-        brace_count = text.count('{') - text.count('}')
-        if brace_count > 0:
-            text += '}' * brace_count
+        text += '}' * brace_count
+        brace_count = 0
+
+    # 7. Ensure we have at least basic JSON structure
+    if not text.startswith(('{', '[')):
+        # If it doesn't start with JSON markers, wrap it; json.dumps escapes
+        # quotes, backslashes and control characters, so the result is final
+        return '{"response": ' + json.dumps(text) + '}'
 
     # 4. Fix malformed escape sequences more aggressively
     # Replace any backslash that's not followed by valid JSON escape chars
-    text = re.sub(r'\\(?!["\\/bfnrtu])', r"\\\\", text)
+    if '\\' in text:
+        text = _RE_BAD_ESCAPE.sub(r"\\\\", text)
 
     # 5. Handle unescaped quotes within strings (very common Leo AI issue)
     # Look for patterns like "selector": "div.class[attr="value"]"
     # and escape the inner quotes
-    text = re.sub(r'("selector"\s*:\s*"[^"]*)"([^"]*)"([^"]*")', lambda m: m.group(1) + m.group(2).replace('"', '\\"') + m.group(3), text)
+    if '"selector"' in text:
+        text = _RE_SELECTOR_QUOTES.sub(lambda m: m.group(1) + m.group(2).replace('"', '\\"') + m.group(3), text)
 
     # 6. Fix incomplete strings that might cause parsing issues
     # Find strings that start but don't end properly
-    lines = text.split('\n')
-    for i, line in enumerate(lines):
+    # Walk line boundaries in place and splice only the first offending line
+    start = 0 if '"' in text else -1
+    while start != -1:
+        end = text.find('\n', start)
+        line = text[start:] if end == -1 else text[start:end]
         # Check for lines that have opening quote but no closing quote
-        if '"' in line and line.count('"') % 2 == 1:
+        if line.count('"') & 1:
             # If it ends with a colon or comma, it might be incomplete
-            if line.strip().endswith((':',';')):
+            if line.strip().endswith((':', ';')):
                 # Try to close the string
-                if not line.strip().endswith('",'):
-                    lines[i] = line.rstrip() + ' "",'
+                text = text[:start] + line.rstrip() + ' "",' + text[start + len(line):]
                 break
+        start = -1 if end == -1 else end + 1
 
-    text = '\n'.join(lines)
-
-    # 7. Ensure we have at least basic JSON structure
     text = text.strip()
-    if not text.startswith('{') and not text.startswith('['):
-        # If it doesn't start with JSON markers, wrap it
-        text = f'{{"response": "{text.replace(chr(34), chr(92) + chr(34))}"}}'
 
     # 8. Final cleanup - remove any remaining problematic characters
     # Remove null bytes and other control characters that might break JSON
-    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    text = text.translate(_CTRL_DELETE)
 
     # 9. Validate JSON structure one more time
-    brace_count = text.count('{') - text.count('}')
-    bracket_count = text.count('[') - text.count(']')
-
     if brace_count > 0:
         text += '}' * brace_count
     if bracket_count > 0:
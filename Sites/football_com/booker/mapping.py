@@ -6,6 +6,24 @@ Translates prediction text into site-specific market and outcome names.
 import re
 from typing import Dict
 
+# Team-independent predictions resolved with a single lookup
+_EXACT_MAPPINGS = {
+    "DRAW": ("1X2", "Draw"),
+    "X": ("1X2", "Draw"),
+    "1": ("1X2", "Home"),
+    "2": ("1X2", "Away"),
+    "1X": ("Double Chance", "Home or Draw"),
+    "X2": ("Double Chance", "Draw or Away"),
+    "12": ("Double Chance", "Home or Away"),
+    "BTTS": ("GG/NG", "Yes"),
+    "BTTS YES": ("GG/NG", "Yes"),
+    "BTTS_YES": ("GG/NG", "Yes"),
+    "BTTS NO": ("GG/NG", "No"),
+    "BTTS_NO": ("GG/NG", "No"),
+}
+_OVER_UNDER_RE = re.compile(r'(OVER|UNDER)[_\s]+(\d+\.5)')
+_GOAL_RANGE_RE = re.compile(r'(\d+-\d+)\s*GOALS')
+
 async def find_market_and_outcome(prediction: Dict) -> tuple:
     """Map prediction to market name and outcome name."""
     pred_text = prediction.get('prediction', '').strip()
@@ -17,6 +35,12 @@ async def find_market_and_outcome(prediction: Dict) -> tuple:
 
     # Normalize strings
     pt_upper = pred_text.upper()
+    # Clean parens for Team Name checks
+    clean_pt = pt_upper.replace("(", "").replace(")", "")
+    exact = _EXACT_MAPPINGS.get(clean_pt)
+    if exact:
+        return exact
+
     ht_upper = home_team.upper()
     at_upper = away_team.upper()
 
@@ -28,17 +52,11 @@ async def find_market_and_outcome(prediction: Dict) -> tuple:
         return "Draw No Bet", "Home" # Risky default, better to rely on parsing
 
     # --- 1. 1X2 (Match Winner) ---
-    if pt_upper == "DRAW":
-        return "1X2", "Draw"
-    
-    # Clean parens for Team Name checks
-    clean_pt = pt_upper.replace("(", "").replace(")", "")
-    
-    if clean_pt in [f"{ht_upper} TO WIN", f"{ht_upper} WIN", ht_upper, "1"]:
+    # "DRAW", "X", "1" and "2" are resolved by _EXACT_MAPPINGS above
+    if clean_pt in [f"{ht_upper} TO WIN", f"{ht_upper} WIN", ht_upper]:
         return "1X2", "Home"
-    if clean_pt in [f"{at_upper} TO WIN", f"{at_upper} WIN", at_upper, "2"]:
+    if clean_pt in [f"{at_upper} TO WIN", f"{at_upper} WIN", at_upper]:
         return "1X2", "Away"
-    if pt_upper == "X": return "1X2", "Draw"
     
     # --- 1.5 Team Win (Alternative) ---
     if f"{ht_upper} TO WIN" in pt_upper: return "1X2", "Home"
@@ -60,7 +78,7 @@ async def find_market_and_outcome(prediction: Dict) -> tuple:
 
     # --- 4. Over/Under ---
     if ("OVER" in pt_upper or "UNDER" in pt_upper) and "&" not in pt_upper and "AND" not in pt_upper:
-        match = re.search(r'(OVER|UNDER)[_\s]+(\d+\.5)', pt_upper)
+        match = _OVER_UNDER_RE.search(pt_upper)
         if match:
             line = match.group(2)
             type_str = match.group(1).title()
@@ -69,7 +87,7 @@ async def find_market_and_outcome(prediction: Dict) -> tuple:
     # --- 6. Goal Range ---
     if "GOALS" in pt_upper and "-" in pt_upper:
         # e.g., "1-2 GOALS" -> "1-2 Goals"
-        match = re.search(r'(\d+-\d+)\s*GOALS', pt_upper)
+        match = _GOAL_RANGE_RE.search(pt_upper)
         if match:
              return "Goal Bounds", match.group(1)
 
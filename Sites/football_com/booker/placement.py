@@ -4,6 +4,7 @@ Handles adding selections to the slip and finalizing accumulators.
 """
 
 import asyncio
+import atexit
 from typing import List, Dict
 from pathlib import Path
 from datetime import datetime as dt
@@ -22,6 +23,56 @@ from .ui import robust_click, handle_page_overlays, dismiss_overlays
 from .mapping import find_market_and_outcome
 from .slip import get_bet_slip_count
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import Error as PlaywrightError
+
+# Error-message fragments that mean the page, context or browser is gone
+_CLOSURE_MARKERS = (
+    "target closed",
+    "browser has been closed",
+    "context was closed",
+    "page has been closed",
+)
+
+# Append handle for DB/bookings.txt, opened on first booking and closed at exit
+_BOOKINGS_FH = None
+
+
+def _close_bookings_file():
+    if _BOOKINGS_FH is not None:
+        _BOOKINGS_FH.close()
+
+
+atexit.register(_close_bookings_file)
+
+# True once the slip badge (CSS selector) shows more than n bets
+_SLIP_ABOVE_JS = """([sel, n]) => {
+    const el = document.querySelector(sel);
+    return !!el && parseInt(el.textContent.replace(/\\D/g, '') || '0', 10) > n;
+}"""
+
+
+async def _wait_for_match_page(page: Page, timeout: int = 10000):
+    """Wait until the match page shows its search icon or the #app iframe, instead of a fixed sleep."""
+    ready = page.locator("#app")
+    search_sel = get_selector("fb_match_page", "search_icon")
+    if search_sel:
+        ready = page.locator(search_sel).or_(ready)
+    try:
+        await ready.first.wait_for(state='visible', timeout=timeout)
+    except PlaywrightError:
+        pass
+
+
+async def _wait_for_slip_count_above(page: Page, count: int, timeout: int = 5000) -> int:
+    """Wait for the slip badge to exceed `count`, then return the current slip count."""
+    badge_sel = get_selector("fb_global", "betslip_count_badge")
+    if badge_sel:
+        try:
+            await page.wait_for_function(_SLIP_ABOVE_JS, arg=[badge_sel, count], timeout=timeout)
+        except Exception:
+            # Timed out or not a plain CSS selector; fall through to a direct read
+            pass
+    return await get_bet_slip_count(page)
 
 async def ensure_bet_insights_collapsed(page: Page):
     """Ensure the bet insights widget is collapsed to prevent obstruction."""
@@ -48,23 +99,40 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
     processed_urls = set()
     MAX_BETS = 50
 
+    # Index predictions once; setdefault keeps the first entry per fixture like the old linear scan
+    pred_by_id: Dict[str, Dict] = {}
+    for p in day_predictions:
+        pred_by_id.setdefault(str(p.get('fixture_id', '')), p)
+
+    # Slip count is tracked locally and only re-read after actions that change it
+    current_count = await get_bet_slip_count(page)
+
     for match_id, match_url in matched_urls.items():
-        if await get_bet_slip_count(page) >= MAX_BETS:
+        if current_count >= MAX_BETS:
+            current_count = await get_bet_slip_count(page)
+        if current_count >= MAX_BETS:
             print(f"[Info] Slip full ({MAX_BETS}). Finalizing accumulator.")
             await finalize_accumulator(page, target_date)
+            current_count = await get_bet_slip_count(page)
 
         if not match_url or match_url in processed_urls: continue
         
-        pred = next((p for p in day_predictions if str(p.get('fixture_id', '')) == str(match_id)), None)
+        pred = pred_by_id.get(str(match_id))
         if not pred or pred.get('prediction') == 'SKIP': continue
 
         print(f"[Match Found] {pred['home_team']} vs {pred['away_team']}")
         processed_urls.add(match_url)
 
+        # Resolve the market before navigating so unmappable predictions cost no page load
+        m_name, o_name = await find_market_and_outcome(pred)
+        if not m_name:
+            print(f"    [Info] No market found for prediction: {pred.get('prediction', 'N/A')}")
+            update_prediction_status(match_id, target_date, 'dropped')
+            continue
+
         try:
             if page.is_closed():
                 print("  [Fatal] Page was closed before navigation. Aborting.")
-                from playwright.async_api import Error as PlaywrightError
                 raise PlaywrightError("Page closed before navigation")
 
             print(f"    [Nav] Navigating to match: {match_url}")
@@ -72,10 +140,9 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
 
             if page.is_closed():
                 print("  [Fatal] Page was closed immediately after navigation. Aborting.")
-                from playwright.async_api import Error as PlaywrightError
                 raise PlaywrightError("Page closed after navigation")
 
-            await asyncio.sleep(5)
+            await _wait_for_match_page(page)
             await neo_popup_dismissal(page, match_url)
             await ensure_bet_insights_collapsed(page)
 
@@ -86,12 +153,6 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
                 update_prediction_status(match_id, target_date, 'dropped')
                 continue
 
-            m_name, o_name = await find_market_and_outcome(pred)
-            if not m_name:
-                print(f"    [Info] No market found for prediction: {pred.get('prediction', 'N/A')}")
-                update_prediction_status(match_id, target_date, 'dropped')
-                continue
-            
             # Special handling for Draw No Bet abbreviation
             search_market_name = m_name
             if m_name.endswith("(DNB)"):
@@ -106,11 +167,10 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
             
             if search_sel:
                 try:
-                    if await frame.locator(search_sel).count() > 0:
-                        await frame.locator(search_sel).first.click()
-                        print(f"    [Betting] Clicked search with selector: {search_sel}")
-                        search_clicked = True
-                        await asyncio.sleep(1)
+                    # click() auto-waits for the element, so no separate count() round-trip
+                    await frame.locator(search_sel).first.click(timeout=5000)
+                    print(f"    [Betting] Clicked search with selector: {search_sel}")
+                    search_clicked = True
                 except Exception as e:
                     print(f"    [Betting] Search selector failed: {search_sel} - {e}")
             else:
@@ -127,14 +187,13 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
             
             if input_sel:
                 try:
-                    if await frame.locator(input_sel).count() > 0:
-                        search_input = frame.locator(input_sel).first
-                        await search_input.fill(search_market_name)
-                        await asyncio.sleep(0.5)
-                        await page.keyboard.press("Enter")
-                        print(f"    [Betting] Filled '{search_market_name}' and pressed Enter.")
-                        input_found = True
-                        await asyncio.sleep(3) # Wait for filter to apply
+                    # fill() waits for the input to appear after the search click
+                    search_input = frame.locator(input_sel).first
+                    await search_input.fill(search_market_name, timeout=5000)
+                    await asyncio.sleep(0.5)
+                    await page.keyboard.press("Enter")
+                    print(f"    [Betting] Filled '{search_market_name}' and pressed Enter.")
+                    input_found = True
                 except Exception as e:
                     print(f"    [Betting] Input selector failed: {input_sel} - {e}")
             else:
@@ -150,6 +209,15 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
             bet_selected = False
             
             if row_container:
+                # Construct specific selector
+                outcome_sel = f"{row_container} > div:has-text('{o_name}')"
+
+                # Wait for the filter to apply and the outcome to render
+                try:
+                    await frame.locator(outcome_sel).first.wait_for(state='visible', timeout=5000)
+                except PlaywrightError:
+                    pass
+
                 # Check if we actually have any rows visible after search
                 try:
                     visible_rows = await frame.locator(row_container).count()
@@ -159,23 +227,20 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
                 except:
                     pass
 
-                # Construct specific selector
-                # Construct specific selector
-                outcome_sel = f"{row_container} > div:has-text('{o_name}')"
                 try:
-                    if await frame.locator(outcome_sel).count() > 0:
-                        count_before = await get_bet_slip_count(page)
-                        if await robust_click(frame.locator(outcome_sel).first, page):
-                            await asyncio.sleep(2)
-                            if await get_bet_slip_count(page) > count_before:
-                                selected_bets += 1
-                                update_prediction_status(match_id, target_date, 'booked')
-                                # Sync with Registry
-                                site_id = get_site_match_id(target_date, pred['home_team'], pred['away_team'])
-                                update_site_match_status(site_id, 'booked', fixture_id=match_id)
-                                
-                                print(f"    [Success] Added bet for {pred['home_team']} vs {pred['away_team']}")
-                                bet_selected = True
+                    # robust_click already returns False when nothing matches
+                    if await robust_click(frame.locator(outcome_sel).first, page):
+                        count_after = await _wait_for_slip_count_above(page, current_count)
+                        if count_after > current_count:
+                            current_count = count_after
+                            selected_bets += 1
+                            update_prediction_status(match_id, target_date, 'booked')
+                            # Sync with Registry
+                            site_id = get_site_match_id(target_date, pred['home_team'], pred['away_team'])
+                            update_site_match_status(site_id, 'booked', fixture_id=match_id)
+                            
+                            print(f"    [Success] Added bet for {pred['home_team']} vs {pred['away_team']}")
+                            bet_selected = True
                 except Exception as e:
                     print(f"    [Betting] Outcome selector failed: {outcome_sel} - {e}")
             else:
@@ -191,20 +256,14 @@ async def place_bets_for_matches(page: Page, matched_urls: Dict[str, str], day_p
         except Exception as e:
             print(f"    [Error] Match failed: {e}")
             # Check for Playwright-specific errors indicating page/browser closure
-            from playwright.async_api import Error as PlaywrightError
             error_msg = str(e).lower()
-            is_closure_error = (
-                "target closed" in error_msg or 
-                "browser has been closed" in error_msg or 
-                "context was closed" in error_msg or
-                "page has been closed" in error_msg
-            )
+            is_closure_error = any(m in error_msg for m in _CLOSURE_MARKERS)
             if is_closure_error or isinstance(e, PlaywrightError):
                 print("    [Fatal] Browser or Page closed during betting loop. Aborting.")
                 raise e
 
     print(f"  [Summary] Selected {selected_bets} bets for {target_date}.")
-    if await get_bet_slip_count(page) > 0:
+    if current_count > 0:
         await finalize_accumulator(page, target_date)
 
 async def finalize_accumulator(page: Page, target_date: str) -> bool:
@@ -245,14 +304,13 @@ async def finalize_accumulator(page: Page, target_date: str) -> bool:
         
         if stake_sel:
             try:
-                if await page.locator(stake_sel).count() > 0:
-                    input_field = page.locator(stake_sel).first
-                    await input_field.click()
-                    await input_field.fill("1")
-                    await page.keyboard.press("Enter")
-                    print(f"    [Betting] Entered stake with selector: {stake_sel}")
-                    stake_entered = True
-                    await asyncio.sleep(1)
+                input_field = page.locator(stake_sel).first
+                await input_field.click(timeout=5000)
+                await input_field.fill("1")
+                await page.keyboard.press("Enter")
+                print(f"    [Betting] Entered stake with selector: {stake_sel}")
+                stake_entered = True
+                await asyncio.sleep(1)
             except Exception as e:
                 print(f"    [Betting] Stake selector failed: {stake_sel} - {e}")
 
@@ -281,8 +339,7 @@ async def finalize_accumulator(page: Page, target_date: str) -> bool:
         
         if confirm_sel:
             try:
-                if await page.locator(confirm_sel).count() > 0:
-                    await robust_click(page.locator(confirm_sel).first, page)
+                if await robust_click(page.locator(confirm_sel).first, page):
                     print(f"    [Betting] Confirmed bet with selector: {confirm_sel}")
                     await asyncio.sleep(3)
                     
@@ -308,11 +365,10 @@ async def extract_booking_details(page: Page) -> str:
     
     if code_sel:
         try:
-            if await page.locator(code_sel).count() > 0:
-                code = await page.locator(code_sel).first.inner_text()
-                if code and code.strip():
-                    print(f"    [Booking] Code: {code.strip()}")
-                    return code.strip()
+            code = await page.locator(code_sel).first.inner_text(timeout=5000)
+            if code and code.strip():
+                print(f"    [Booking] Code: {code.strip()}")
+                return code.strip()
         except Exception as e:
             print(f"    [Booking] Code selector failed: {code_sel} - {e}")
             
@@ -325,19 +381,19 @@ async def save_booking_code(target_date: str, booking_code: str, page: Page):
     Save booking code to file and capture betslip screenshot.
     Stores in DB/bookings.txt with timestamp and date association.
     """
-    from pathlib import Path
-    
+    global _BOOKINGS_FH
     try:
         # Save to bookings file
         db_dir = Path("DB")
-        db_dir.mkdir(exist_ok=True)
-        bookings_file = db_dir / "bookings.txt"
+        if _BOOKINGS_FH is None:
+            db_dir.mkdir(exist_ok=True)
+            # Line-buffered so each entry reaches disk as soon as it is written
+            _BOOKINGS_FH = open(db_dir / "bookings.txt", "a", encoding="utf-8", buffering=1)
         
         timestamp = dt.now().strftime("%Y-%m-%d %H:%M:%S")
         booking_entry = f"{timestamp} | Date: {target_date} | Code: {booking_code}\n"
         
-        with open(bookings_file, "a", encoding="utf-8") as f:
-            f.write(booking_entry)
+        _BOOKINGS_FH.write(booking_entry)
         
         print(f"    [Booking] Saved code {booking_code} to bookings.txt")
         
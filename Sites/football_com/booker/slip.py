@@ -10,6 +10,8 @@ from .ui import robust_click
 from Neo.selector_manager import SelectorManager
 from Neo.intelligence import get_selector, get_selector_auto
 
+_NON_DIGIT = re.compile(r'\D')
+
 async def get_bet_slip_count(page: Page) -> int:
     """Extract current number of bets in the slip using dynamic selector."""
     count_sel = await get_selector_auto(page, "fb_global", "betslip_count_badge")
@@ -18,7 +20,8 @@ async def get_bet_slip_count(page: Page) -> int:
         try:
             if await page.locator(count_sel).count() > 0:
                 text = await page.locator(count_sel).first.inner_text(timeout=2000)
-                count = int(re.sub(r'\D', '', text) or 0)
+                text = text.strip()
+                count = int(text) if text.isdecimal() else int(_NON_DIGIT.sub('', text) or 0)
                 if count > 0:
                     return count
         except Exception as e:
@@ -39,8 +42,7 @@ async def clear_bet_slip(page: Page):
             
             if open_sel:
                 try:
-                    if await page.locator(open_sel).count() > 0:
-                        await robust_click(page.locator(open_sel).first, page)
+                    if await robust_click(page.locator(open_sel).first, page):
                         print(f"    [Slip] Opened bet slip with selector: {open_sel}")
                         slip_opened = True
                         await asyncio.sleep(2)
@@ -59,21 +61,19 @@ async def clear_bet_slip(page: Page):
             
             if clear_sel:
                 try:
-                    if await page.locator(clear_sel).count() > 0:
-                        await page.locator(clear_sel).first.click()
-                        print(f"    [Slip] Clicked clear with selector: {clear_sel}")
-                        bets_cleared = True
-                        await asyncio.sleep(1)
+                    await page.locator(clear_sel).first.click(timeout=5000)
+                    print(f"    [Slip] Clicked clear with selector: {clear_sel}")
+                    bets_cleared = True
+                    await asyncio.sleep(1)
 
-                        # Confirm clear action if confirmation appears
-                        confirm_sel = await get_selector_auto(page, "fb_global", "confirm_bet_button")
-                        if confirm_sel:
-                            try:
-                                if await page.locator(confirm_sel).count() > 0:
-                                    await page.locator(confirm_sel).first.click()
-                                    print(f"    [Slip] Confirmed clear with selector: {confirm_sel}")
-                            except:
-                                pass
+                    # Confirm clear action if confirmation appears
+                    confirm_sel = await get_selector_auto(page, "fb_global", "confirm_bet_button")
+                    if confirm_sel:
+                        try:
+                            await page.locator(confirm_sel).first.click(timeout=2000)
+                            print(f"    [Slip] Confirmed clear with selector: {confirm_sel}")
+                        except:
+                            pass
                 except Exception as e:
                     print(f"    [Slip] Clear selector failed: {clear_sel} - {e}")
 
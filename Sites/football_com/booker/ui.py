@@ -5,43 +5,61 @@ Handles overlays, tutorials, and resilient click interactions.
 
 import asyncio
 from playwright.async_api import Page, Locator
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from Helpers.utils import log_error_state
 from Neo.selector_manager import SelectorManager
 
+# Sticky elements that intercept clicks on match pages
+_OVERLAY_SELECTORS = (
+    "footer.CommentFooter", "section#event-detail-header-nav",
+    "div.dialog-wrapper", ".m-dialog-mask", ".m-popup-mask",
+    "div.srct-widget-indicator_custom", "div.m-main-right",
+    "div.m-tutorial-mask", "div.m-tutorial"
+)
+
+# Tutorial/close controls clicked by dismiss_overlays
+_DISMISS_SELECTORS = ("text='Next'", "text='Got it'", "text='Skip'", ".m-tutorial-close", ".m-close-btn")
+
+# Hides every selector in one round-trip; selectors are passed as data, not spliced into the source
+_HIDE_OVERLAYS_JS = """(sels) => {
+    for (const s of sels) {
+        try { document.querySelectorAll(s).forEach(el => el.style.display = 'none'); } catch (e) {}
+    }
+}"""
+
 async def handle_page_overlays(page: Page):
     """Forcefully hide or remove sticky elements that intercept clicks."""
     try:
         await page.keyboard.press("Escape")
     except: pass
 
-    selectors = [
-        "footer.CommentFooter", "section#event-detail-header-nav",
-        "div.dialog-wrapper", ".m-dialog-mask", ".m-popup-mask",
-        "div.srct-widget-indicator_custom", "div.m-main-right",
-        "div.m-tutorial-mask", "div.m-tutorial"
-    ]
-    
-    for selector in selectors:
-        try:
-            await page.evaluate(f"document.querySelectorAll('{selector}').forEach(el => el.style.display = 'none')")
-        except: pass
+    try:
+        await page.evaluate(_HIDE_OVERLAYS_JS, list(_OVERLAY_SELECTORS))
+    except: pass
 
 async def robust_click(locator: Locator, page: Page, timeout: int = 5000):
     """A resilient click function that handles overlays and retries via dispatch_event."""
     try:
         await handle_page_overlays(page)
-        if await locator.count() > 0:
+        # is_visible() never waits and is False when nothing matches, so one probe
+        # replaces count() and makes a missing or hidden element a fast miss
+        if await locator.is_visible():
             try:
                 await locator.scroll_into_view_if_needed(timeout=2000)
             except: pass
-            
-            if await locator.is_visible(timeout=timeout):
-                try:
-                    await locator.click(timeout=timeout, force=True)
-                    return True
-                except Exception:
-                    await locator.dispatch_event("click")
-                    return True
+
+            try:
+                await locator.click(timeout=timeout, force=True)
+                return True
+            except PlaywrightTimeoutError:
+                # Hidden/collapsed since the probe: that is a miss, not a click to force
+                if not await locator.is_visible():
+                    return False
+                await locator.dispatch_event("click")
+                return True
+            except Exception:
+                await locator.dispatch_event("click")
+                return True
         return False
     except Exception as e:
         print(f"    [Action Error] robust_click failed: {e}")
@@ -49,12 +67,17 @@ async def robust_click(locator: Locator, page: Page, timeout: int = 5000):
 
 async def dismiss_overlays(page: Page):
     """Actively click 'Skip' or 'Close' on common UI overlays."""
-    overlays = ["text='Next'", "text='Got it'", "text='Skip'", ".m-tutorial-close", ".m-close-btn"]
-    for sel in overlays:
+    # One visible-only union answers "is anything there?" in a single round-trip;
+    # each pass clicks the first visible control until none remain
+    visible = page.locator(f"{_DISMISS_SELECTORS[0]} >> visible=true")
+    for sel in _DISMISS_SELECTORS[1:]:
+        visible = visible.or_(page.locator(f"{sel} >> visible=true"))
+    for _ in range(len(_DISMISS_SELECTORS)):
         try:
-            if await page.locator(sel).first.is_visible(timeout=500):
-                await page.locator(sel).first.click(timeout=1000)
-        except: pass
+            if await visible.count() == 0:
+                break
+            await visible.first.click(timeout=1000)
+        except: break
 
 async def wait_for_element(page: Page, selector: str, timeout: int = 10000) -> bool:
     """Helper to wait for visibility with boolean return."""
@@ -3,19 +3,102 @@ Extractor Module
 Handles extraction of leagues and matches from Football.com schedule pages.
 """
 
-import asyncio
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
 
-from playwright.async_api import Page
+from playwright.async_api import BrowserContext, Locator, Page
 
 from Neo.selector_manager import SelectorManager
 from Neo.intelligence import get_selector
-from Helpers.constants import WAIT_FOR_LOAD_STATE_TIMEOUT
 from .navigator import hide_overlays
 
-
-async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
-    """Iterates through all league headers, expands them, and extracts matches for a specific date."""
+# Reads every league header's title/h4 text and title visibility in one round-trip
+_HEADER_INFO_JS = """(headers, titleSel) => {
+    const isVisible = (el) => !!el
+        && !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)
+        && getComputedStyle(el).visibility !== 'hidden';
+    return headers.map((header) => {
+        let title = null;
+        try { title = header.querySelector(titleSel); } catch (e) {}
+        const h4 = header.querySelector('h4');
+        return {
+            titleVisible: isVisible(title),
+            title: title ? title.innerText : '',
+            h4: h4 ? h4.innerText : null,
+        };
+    });
+}"""
+
+
+# Collects the match cards in the section right after a league header (the header's next sibling).
+# Each field selector is queried once over the whole section and its hits are mapped back to
+# their card, rather than running four querySelector calls per card.
+_EXTRACT_SECTION_JS = """(header, args) => {
+    const { selectors, leagueText } = args;
+    const results = [];
+    const container = header.nextElementSibling;
+    if (!container) return results;
+    const cards = Array.from(container.querySelectorAll(selectors.match_card_sel));
+    if (!cards.length) return results;
+
+    const cardIndex = new Map(cards.map((card, i) => [card, i]));
+    const fields = cards.map(() => ({}));
+    const collect = (sel, key) => {
+        for (const el of container.querySelectorAll(sel)) {
+            const parent = el.parentElement;
+            const card = parent ? parent.closest(selectors.match_card_sel) : null;
+            const i = cardIndex.get(card);
+            // First hit in document order wins, matching card.querySelector
+            if (i !== undefined && !(key in fields[i])) fields[i][key] = el;
+        }
+    };
+    collect(selectors.home_team_sel, 'home');
+    collect(selectors.away_team_sel, 'away');
+    collect(selectors.time_sel, 'time');
+    collect(selectors.match_url_sel, 'url');
+
+    cards.forEach((card, i) => {
+        const f = fields[i];
+        const linkEl = f.url || card.closest('a');
+        const home = f.home ? f.home.innerText.trim() : "";
+        const away = f.away ? f.away.innerText.trim() : "";
+
+        if (home && away) {
+            results.push({
+                home: home,
+                away: away,
+                time: f.time ? f.time.innerText.trim() : "N/A",
+                league: leagueText,
+                url: linkEl ? linkEl.href : "",
+                date: args.targetDate
+            });
+        }
+    });
+    return results;
+}"""
+
+
+# Installed once per context so each section extraction only sends a short trampoline
+_EXTRACT_SECTION_INIT_SCRIPT = f"window.__leoExtractMatchSection = {_EXTRACT_SECTION_JS};"
+_EXTRACT_SECTION_CALL_JS = """(header, args) => window.__leoExtractMatchSection
+    ? window.__leoExtractMatchSection(header, args)
+    : null"""
+
+
+async def register_extraction_script(context: BrowserContext):
+    """Install the section extractor on every document the context loads from now on."""
+    await context.add_init_script(script=_EXTRACT_SECTION_INIT_SCRIPT)
+
+
+async def _extract_section(header_locator: Locator, args: Dict) -> List[Dict]:
+    """Run the section extractor, sending the full script only if the page predates registration."""
+    result = await header_locator.evaluate(_EXTRACT_SECTION_CALL_JS, args)
+    if result is None:
+        result = await header_locator.evaluate(_EXTRACT_SECTION_JS, args)
+    return result
+
+
+async def extract_league_matches(page: Page, target_date: str) -> AsyncIterator[Dict]:
+    """Iterates through all league headers, expands them, and yields matches for a specific date as each league is harvested."""
     print("  [Harvest] Starting 'Expand & Harvest' sequence...")
     await hide_overlays(page)
     all_matches = []
@@ -29,19 +112,36 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
     home_team_sel = get_selector("fb_schedule_page", "match_row_home_team_name") or ".home-team-name"
     away_team_sel = get_selector("fb_schedule_page", "match_row_away_team_name") or ".away-team-name"
     time_sel = get_selector("fb_schedule_page", "match_row_time") or ".time"
+    section_selectors = {
+        "match_card_sel": match_card_sel,
+        "match_url_sel": match_url_sel,
+        "home_team_sel": home_team_sel,
+        "away_team_sel": away_team_sel,
+        "time_sel": time_sel
+    }
 
     try:
+        # Wait for the first match card instead of a fixed delay; empty schedules still proceed
+        try:
+            await page.locator(match_card_sel).first.wait_for(state='attached', timeout=5000)
+        except Exception:
+            pass
+
         league_headers = await page.locator(league_header_sel).all()
+        header_info = await page.locator(league_header_sel).evaluate_all(_HEADER_INFO_JS, league_title_sel)
         print(f"  [Harvest] Found {len(league_headers)} league headers.")
 
         for i, header_locator in enumerate(league_headers):
             try:
                 # Extract League Name
                 league_element = header_locator.locator(league_title_sel).first
-                if await league_element.is_visible():
-                    league_text = (await league_element.inner_text(timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)).strip().replace('\n', ' - ')
-                elif await header_locator.locator("h4").count() > 0:
-                    league_text = (await header_locator.locator("h4").first.inner_text()).strip().replace('\n', ' - ')
+                # Batched probe result; the title link's visibility is reused for the click target and the close toggle
+                info = header_info[i] if i < len(header_info) else {'titleVisible': False, 'title': '', 'h4': None}
+                title_visible = info['titleVisible']
+                if title_visible:
+                    league_text = info['title'].strip().replace('\n', ' - ')
+                elif info['h4'] is not None:
+                    league_text = info['h4'].strip().replace('\n', ' - ')
                 else:
                     league_text = f"Unknown League {i+1}"
                 
@@ -54,7 +154,6 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                 # Expansion Logic
                 if i == 0:
                      print(f"    -> {league_text}: Default open state (League 1). Skipping expand click.")
-                     await asyncio.sleep(0.1) # Optimized
 
                 else:
                      # Click to expand - Primary Method with Force & JS Fallback
@@ -64,7 +163,7 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                          
                          if await league_header_locator.count() == 0:
                              # Fallback to the generic header_locator if h4 doesn't match perfectly
-                             target_el = league_element if await league_element.is_visible() else header_locator
+                             target_el = league_element if title_visible else header_locator
                          else:
                              target_el = league_header_locator
 
@@ -73,52 +172,17 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                          await target_el.click(force=True, timeout=5000)
                      except Exception as click_error:
                          # Fallback to JS click
-                         target_el = league_element if await league_element.is_visible() else header_locator
+                         target_el = league_element if title_visible else header_locator
                          await target_el.evaluate("el => el.click()")
 
 
-                # Extraction Function (Reusable blob)
-                matches_in_section = []
-                # Efficiently wait for the container without arbitrary sleep
-                matches_container = await header_locator.evaluate_handle('(el) => el.nextElementSibling')
-
-                if matches_container:
-                    matches_in_section = await matches_container.evaluate("""(container, args) => {
-                        const { selectors, leagueText } = args;
-                        const results = [];
-                        const cards = container.querySelectorAll(selectors.match_card_sel);
-                        cards.forEach(card => {
-                            const homeEl = card.querySelector(selectors.home_team_sel);
-                            const awayEl = card.querySelector(selectors.away_team_sel);
-                            const timeEl = card.querySelector(selectors.time_sel);
-                            const linkEl = card.querySelector(selectors.match_url_sel) || card.closest('a');
-                            
-                            const home = homeEl ? homeEl.innerText.trim() : "";
-                            const away = awayEl ? awayEl.innerText.trim() : "";
-
-                            if (home && away) {
-                                results.push({ 
-                                    home: home, 
-                                    away: away, 
-                                    time: timeEl ? timeEl.innerText.trim() : "N/A", 
-                                    league: leagueText, 
-                                    url: linkEl ? linkEl.href : "", 
-                                    date: args.targetDate 
-                                });
-                            }
-                        });
-                        return results;
-                    }""", {
-                        "selectors": {
-                            "match_card_sel": match_card_sel, 
-                            "match_url_sel": match_url_sel,
-                            "home_team_sel": home_team_sel,
-                            "away_team_sel": away_team_sel,
-                            "time_sel": time_sel
-                        }, 
-                        "leagueText": league_text, 
-                        "targetDate": target_date
-                    })
+                # Extract the section that follows this header in one round-trip
+                section_args = {
+                    "selectors": section_selectors,
+                    "leagueText": league_text,
+                    "targetDate": target_date
+                }
+                matches_in_section = await _extract_section(header_locator, section_args)
 
                 # Retry Logic for non-first leagues if empty
                 if not matches_in_section and i > 0:
@@ -127,52 +191,20 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
                          await page.locator(f"h4:text-is('{league_text}')").first.click(timeout=3000)
                      except:
                          pass
-                     await asyncio.sleep(0.5)
+                     # Wait for a card to appear in this header's section rather than sleeping
+                     try:
+                         await header_locator.locator("xpath=following-sibling::*[1]").locator(match_card_sel).first.wait_for(state='attached', timeout=2000)
+                     except Exception:
+                         pass
                      
                      # Re-evaluate
-                     matches_container = await header_locator.evaluate_handle('(el) => el.nextElementSibling')
-                     if matches_container:
-                        matches_in_section = await matches_container.evaluate("""(container, args) => {
-                            const { selectors, leagueText } = args;
-                            const results = [];
-                            const cards = container.querySelectorAll(selectors.match_card_sel);
-                            cards.forEach(card => {
-                                const homeEl = card.querySelector(selectors.home_team_sel);
-                                const awayEl = card.querySelector(selectors.away_team_sel);
-                                const timeEl = card.querySelector(selectors.time_sel);
-                                const linkEl = card.querySelector(selectors.match_url_sel) || card.closest('a');
-                                
-                                const home = homeEl ? homeEl.innerText.trim() : "";
-                                const away = awayEl ? awayEl.innerText.trim() : "";
-
-                                if (home && away) {
-                                    results.push({ 
-                                        home: home, 
-                                        away: away, 
-                                        time: timeEl ? timeEl.innerText.trim() : "N/A", 
-                                        league: leagueText, 
-                                        url: linkEl ? linkEl.href : "", 
-                                        date: args.targetDate 
-                                    });
-                                }
-                            });
-                            return results;
-                        }""", {
-                            "selectors": {
-                                "match_card_sel": match_card_sel, 
-                                "match_url_sel": match_url_sel,
-                                "home_team_sel": home_team_sel,
-                                "away_team_sel": away_team_sel,
-                                "time_sel": time_sel
-                            }, 
-                            "leagueText": league_text, 
-                            "targetDate": target_date
-                        })
-
+                     matches_in_section = await _extract_section(header_locator, section_args)
 
                 # Result Handling
                 if matches_in_section:
                     all_matches.extend(matches_in_section)
+                    for m in matches_in_section:
+                        yield m
                     print(f"    -> {league_text}: Extracted {len(matches_in_section)} matches.")
                     print(f"       Sample Match: {matches_in_section}")
                 else:
@@ -180,7 +212,7 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
 
                 # Cleanup: Toggle to close
                 print(f"    -> {league_text}: Closing section.")
-                if await league_element.is_visible():
+                if title_visible:
                      await league_element.click()
                 else:
                      await header_locator.click()
@@ -189,22 +221,19 @@ async def extract_league_matches(page: Page, target_date: str) -> List[Dict]:
 
             except Exception as e:
                 print(f"    [Harvest Error] Failed to process a league header: {e}")
+
     except Exception as e:
         print(f"  [Harvest] Overall harvesting error: {e}")
 
     print(f"  [Harvest] Total matches found: {len(all_matches)}")
-    return all_matches
  
 
-async def validate_match_data(matches: List[Dict]) -> List[Dict]:
+def validate_match_data(matches: List[Dict]) -> List[Dict]:
     """Validate and clean extracted match data."""
-    valid_matches = []
-    for match in matches:
-        if all(k in match for k in ['home', 'away', 'url', 'league']):
-            # Basic validation
-            if match['home'] and match['away'] and match['url']:
-                valid_matches.append(match)
-        else:
-            print(f"    [Validation] Skipping invalid match: {match}")
+    # Basic validation: league present, teams and url non-empty
+    valid_matches = [
+        m for m in matches
+        if 'league' in m and m.get('home') and m.get('away') and m.get('url')
+    ]
     print(f"  [Validation] {len(valid_matches)}/{len(matches)} matches valid.")
     return valid_matches
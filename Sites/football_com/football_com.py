@@ -5,6 +5,7 @@ Coordinates all sub-modules to execute the complete booking workflow.
 
 import asyncio
 import os
+from collections import defaultdict
 from datetime import datetime as dt, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional
@@ -14,7 +15,7 @@ from playwright.async_api import Browser, Playwright
 from Helpers.constants import WAIT_FOR_LOAD_STATE_TIMEOUT
 
 from .navigator import load_or_create_session, navigate_to_schedule, select_target_date, extract_balance, log_page_title
-from .extractor import extract_league_matches
+from .extractor import extract_league_matches, register_extraction_script
 from .matcher import match_predictions_with_site, filter_pending_predictions
 from .booker import place_bets_for_matches, finalize_accumulator, clear_bet_slip
 from Helpers.DB_Helpers.db_helpers import (
@@ -29,6 +30,33 @@ from Helpers.utils import log_error_state
 from Helpers.monitor import PageMonitor
 
 
+def _purge_singleton_lock(user_data_dir: Path) -> bool:
+    """Remove Chrome's SingletonLock from the profile dir. True if a lock was removed."""
+    lock_file = user_data_dir / "SingletonLock"
+    if not lock_file.exists():
+        return False
+    try:
+        lock_file.unlink()
+        return True
+    except Exception as e:
+        print(f"  [Warning] Could not remove SingletonLock: {e}")
+        return False
+
+
+async def _harvest_schedule(page, target_date: str) -> Optional[List[Dict]]:
+    """Open the schedule on `page`, select `target_date` and extract its matches. None if the date is unavailable."""
+    await navigate_to_schedule(page)
+    if not await select_target_date(page, target_date):
+        return None
+    return [m async for m in extract_league_matches(page, target_date)]
+
+
+def _needs_harvest(target_date: str, day_predictions: List[Dict]) -> bool:
+    """True if any prediction for the date has no cached site URL in the registry."""
+    cached_fids = {m.get('fixture_id') for m in load_site_matches(target_date) if m.get('url')}
+    return any(str(p.get('fixture_id')) not in cached_fids for p in day_predictions)
+
+
 async def run_football_com_booking(playwright: Playwright):
     """
     Main function to handle Football.com login, match mapping, and bet placement.
@@ -43,19 +71,22 @@ async def run_football_com_booking(playwright: Playwright):
         return
 
     # Group predictions by date (only future dates)
-    predictions_by_date = {}
+    predictions_by_date = defaultdict(list)
     today = dt.now().date()
+    # Many predictions share a date, so each distinct string is parsed once (None = invalid)
+    parsed_dates = {}
     for pred in pending_predictions:
         date_str = pred.get('date')
-        if date_str:
+        if not date_str:
+            continue
+        if date_str not in parsed_dates:
             try:
-                pred_date = dt.strptime(date_str, "%d.%m.%Y").date()
-                if pred_date >= today:
-                    if date_str not in predictions_by_date:
-                        predictions_by_date[date_str] = []
-                    predictions_by_date[date_str].append(pred)
+                parsed_dates[date_str] = dt.strptime(date_str, "%d.%m.%Y").date()
             except ValueError:
-                continue  # Skip invalid dates
+                parsed_dates[date_str] = None  # Skip invalid dates
+        pred_date = parsed_dates[date_str]
+        if pred_date and pred_date >= today:
+            predictions_by_date[date_str].append(pred)
 
     if not predictions_by_date:
         print("  [Info] No predictions found.")
@@ -68,17 +99,14 @@ async def run_football_com_booking(playwright: Playwright):
     
     print(f"  [System] Launching Persistent Context for Football.com... (Data Dir: {user_data_dir})")
     
-    # Pre-emptive lock cleanup
-    lock_file = user_data_dir / "SingletonLock"
-    if lock_file.exists():
-         print("  [System] Found existing SingletonLock. Removing it before launch...")
-         try:
-             lock_file.unlink()
-         except Exception as e:
-             print(f"  [Warning] Could not remove SingletonLock: {e}")
+    # Pre-emptive lock cleanup (off the event loop)
+    if await asyncio.to_thread(_purge_singleton_lock, user_data_dir):
+        print("  [System] Removed existing SingletonLock before launch.")
 
     context = None
     page = None
+    # Next date's schedule harvest, started while the current date's bets are placed
+    prefetched: Dict[str, asyncio.Task] = {}
     
     try:
         context = await playwright.chromium.launch_persistent_context(
@@ -99,15 +127,9 @@ async def run_football_com_booking(playwright: Playwright):
         print(f"  [CRITICAL ERROR] Failed to launch browser: {launch_e}")
         
         # Automatic Lock Cleanup
-        lock_file = user_data_dir / "SingletonLock"
-        if lock_file.exists():
-            print("  [Auto-Fix] detected Chrome SingletonLock. removing...")
-            try:
-                lock_file.unlink()
-                print("  [Auto-Fix] Lock file removed. Please restart.")
-                return 
-            except Exception as lock_e:
-                 print(f"  [Auto-Fix Failed] Could not remove lock file: {lock_e}")
+        if await asyncio.to_thread(_purge_singleton_lock, user_data_dir):
+            print("  [Auto-Fix] Chrome SingletonLock removed. Please restart.")
+            return
 
         print("  [Action Required] Please ensure no other Chrome/Playwright instances are running.")
         print("  [Info] Try 'taskkill /F /IM chrome.exe /T' if this persists.")
@@ -116,6 +138,9 @@ async def run_football_com_booking(playwright: Playwright):
     try:
         # 2. Load or create session
         # Note: navigator now accepts context directly
+        # Make the match extractor resident in every page so harvesting sends only a trampoline
+        await register_extraction_script(context)
+
         _, page = await load_or_create_session(context)
         await log_page_title(page, "Session Loaded")
         
@@ -129,8 +154,12 @@ async def run_football_com_booking(playwright: Playwright):
         balance = await extract_balance(page)
         print(f"  [Balance] Current balance: NGN {balance}")
 
+        # Schedule harvesting runs on its own page so it can overlap bet placement on `page`
+        schedule_page = await context.new_page()
+
         # 4. Process each day's predictions
-        for target_date, day_predictions in sorted(predictions_by_date.items()):
+        dates = sorted(predictions_by_date.items())
+        for idx, (target_date, day_predictions) in enumerate(dates):
             if not page or page.is_closed():
                 print("  [Fatal] Browser connection lost or page closed. Aborting cycle.")
                 break
@@ -139,13 +168,18 @@ async def run_football_com_booking(playwright: Playwright):
 
             # --- REGISTRY CHECK (Optimization) ---
             cached_site_matches = load_site_matches(target_date)
+            # Index by fixture_id once; setdefault keeps the first row per id like a linear scan would
+            by_fid = {}
+            for m in cached_site_matches:
+                by_fid.setdefault(m.get('fixture_id'), m)
             matched_urls = {} # fixture_id -> url
             unmatched_predictions = []
+            # Fixture-id strings computed once, parallel to day_predictions
+            day_fids = [str(p.get('fixture_id')) for p in day_predictions]
 
-            for pred in day_predictions:
-                fid = str(pred.get('fixture_id'))
+            for fid, pred in zip(day_fids, day_predictions):
                 # Check if this prediction is already matched in our registry
-                cached_match = next((m for m in cached_site_matches if m.get('fixture_id') == fid), None)
+                cached_match = by_fid.get(fid)
                 
                 if cached_match and cached_match.get('url'):
                     if cached_match.get('booking_status') == 'booked':
@@ -160,13 +194,16 @@ async def run_football_com_booking(playwright: Playwright):
             if unmatched_predictions:
                 print(f"  [Registry] {len(unmatched_predictions)} predictions need matching. Scraping schedule...")
                 try:
-                    await navigate_to_schedule(page)
-                    if not await select_target_date(page, target_date):
+                    task = prefetched.pop(target_date, None)
+                    if task is not None:
+                        site_matches = await task
+                    else:
+                        site_matches = await _harvest_schedule(schedule_page, target_date)
+                    if site_matches is None:
                         print(f"  [Info] Date {target_date} not available. Skipping.")
                         continue
 
-                    # Extract & Save to Registry
-                    site_matches = await extract_league_matches(page, target_date)
+                    # Save to Registry
                     if site_matches:
                         save_site_matches(site_matches)
                         # Refresh cache after save
@@ -179,31 +216,31 @@ async def run_football_com_booking(playwright: Playwright):
                 new_mappings = await match_predictions_with_site(unmatched_predictions, cached_site_matches)
                 
                 # Update Registry with newly matched fixture_ids
+                by_url = {}
+                for m in cached_site_matches:
+                    by_url.setdefault(m.get('url'), m)
                 for fid, url in new_mappings.items():
                     matched_urls[fid] = url
                     # Find which site match this belongs to and update it
-                    site_match = next((m for m in cached_site_matches if m.get('url') == url), None)
+                    site_match = by_url.get(url)
                     if site_match:
                         update_site_match_status(site_match['site_match_id'], 'pending', fixture_id=fid)
 
+            # --- PREFETCH NEXT DATE ---
+            if idx + 1 < len(dates):
+                next_date, next_predictions = dates[idx + 1]
+                if _needs_harvest(next_date, next_predictions):
+                    prefetched[next_date] = asyncio.create_task(_harvest_schedule(schedule_page, next_date))
+
             # --- BET PLACEMENT ---
             if matched_urls:
                 print(f"  [Action] Proceeding to book {len(matched_urls)} matched predictions...")
                 # We need to pass the full prediction dicts for those that are matched
-                to_book_preds = [p for p in day_predictions if str(p.get('fixture_id')) in matched_urls]
+                to_book_preds = [p for fid, p in zip(day_fids, day_predictions) if fid in matched_urls]
                 
                 # Execute Booking
-                # Note: place_bets_for_matches returns results or updates status
+                # Note: place_bets_for_matches updates prediction and registry status itself
                 await place_bets_for_matches(page, matched_urls, to_book_preds, target_date)
-                
-                # Final Sync: Update our local registry if booking were successful
-                # (This is also handled inside place_bets_for_matches usually, 
-                # but we ensure the registry reflects the 'booked' status)
-                for fid in matched_urls.keys():
-                    # We check predictions.csv status to see if it changed to 'booked'
-                    # Or we could have place_bets_for_matches return the status.
-                    # For now, let's assume if it finished without error, we check later.
-                    pass 
             else:
                 print(f"  [Info] No matches to book for {target_date}.")
                 
@@ -212,5 +249,9 @@ async def run_football_com_booking(playwright: Playwright):
         if page:
             await log_error_state(page, "football_com_fatal", e)
     finally:
+        for task in prefetched.values():
+            task.cancel()
+        # Let cancelled/failed prefetches unwind (and retrieve their exceptions) before the context goes
+        await asyncio.gather(*prefetched.values(), return_exceptions=True)
         if context:
             await context.close()
@@ -3,13 +3,22 @@ Matcher Module
 Handles matching predictions.csv data with extracted Football.com matches using Leo AI.
 """
 
+import asyncio
 import csv
 import difflib
+import logging
+import re
+from collections import OrderedDict
+from functools import lru_cache
 from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
+import numpy as np
 from pathlib import Path
 from Helpers.DB_Helpers.db_helpers import PREDICTIONS_CSV, update_prediction_status
+
+log = logging.getLogger(__name__)
+
 # Import LLM matcher conditionally
 try:
     import Helpers.AI.llm_matcher as llm_module
@@ -17,7 +26,7 @@ try:
 except ImportError:
     llm_module = None
     HAS_LLM = False
-    print("  [Matcher] Warning: LLM dependencies not found. Falling back to simple fuzzy matching.")
+    log.warning("  [Matcher] Warning: LLM dependencies not found. Falling back to simple fuzzy matching.")
 
 # Import RapidFuzz for faster and more accurate fuzzy matching
 try:
@@ -25,7 +34,15 @@ try:
     HAS_RAPIDFUZZ = True
 except ImportError:
     HAS_RAPIDFUZZ = False
-    print("  [Matcher] Warning: RapidFuzz not found. Falling back to difflib.")
+    log.warning("  [Matcher] Warning: RapidFuzz not found. Falling back to difflib.")
+
+# Import SciPy (pulled in by scikit-learn) for optimal one-to-one assignment
+try:
+    from scipy.optimize import linear_sum_assignment
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+    log.warning("  [Matcher] Warning: SciPy not found. Falling back to greedy assignment.")
 
 
 async def filter_pending_predictions() -> List[Dict]:
@@ -34,25 +51,33 @@ async def filter_pending_predictions() -> List[Dict]:
     csv_path = Path(PREDICTIONS_CSV)
     if csv_path.exists():
         with open(csv_path, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            pending_predictions = [row for row in reader if row.get('status') == 'pending']
-    print(f"  [Matcher] Found {len(pending_predictions)} pending predictions.")
+            # Only rows whose status cell is 'pending' are promoted to dicts
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header and 'status' in header:
+                idx = header.index('status')
+                pending_predictions = [
+                    dict(zip(header, row)) for row in reader
+                    if len(row) > idx and row[idx] == 'pending'
+                ]
+    log.info("  [Matcher] Found %d pending predictions.", len(pending_predictions))
     return pending_predictions
 
 
+# Common club suffixes (FC, AFC, CF, ...) stripped from the end of a name in one pass
+_TEAM_SUFFIXES = ('fc', 'afc', 'cf', 'sc', 'ac', 'club', 'united', 'city', 'athletic')
+_SUFFIX_RE = re.compile(r'(?:\s+(?:' + '|'.join(_TEAM_SUFFIXES) + r'))+$')
+_SUFFIX_SET = frozenset(_TEAM_SUFFIXES)
+
+
+@lru_cache(maxsize=4096)
 def normalize_team_name(name: str) -> str:
     """Basic normalization: lower, strip, remove common suffixes/prefixes."""
     if not name:
         return ""
-    name = name.lower().strip()
-    # Remove common suffixes like FC, AFC, CF, etc.
-    suffixes = ['fc', 'afc', 'cf', 'sc', 'ac', 'club', 'united', 'city', 'athletic']
-    for suffix in suffixes:
-        if name.endswith(' ' + suffix):
-            name = name[:-len(suffix)-1].strip()
-        elif name == suffix:
-            name = ""
-    return name
+    name = _SUFFIX_RE.sub('', name.lower().strip())
+    # A name that is only a suffix normalizes to empty
+    return "" if name in _SUFFIX_SET else name
 
 
 def calculate_similarity(str1: str, str2: str) -> float:
@@ -62,13 +87,68 @@ def calculate_similarity(str1: str, str2: str) -> float:
     norm1 = normalize_team_name(str1)
     norm2 = normalize_team_name(str2)
     if HAS_RAPIDFUZZ:
-        try:
-            from rapidfuzz import fuzz
-            return fuzz.token_set_ratio(norm1, norm2) / 100.0
-        except ImportError:
-            return difflib.SequenceMatcher(None, norm1, norm2).ratio()
+        return fuzz.token_set_ratio(norm1, norm2) / 100.0
+    return difflib.SequenceMatcher(None, norm1, norm2).ratio()
+
+
+def similarity_matrix(strs1: List[str], strs2: List[str]) -> np.ndarray:
+    """
+    calculate_similarity for every pair as an (len(strs1), len(strs2)) matrix.
+    With RapidFuzz the whole matrix is scored in one process.cdist call.
+    """
+    norm1 = [normalize_team_name(s) for s in strs1]
+    norm2 = [normalize_team_name(s) for s in strs2]
+    if not norm1 or not norm2:
+        return np.zeros((len(norm1), len(norm2)))
+    if HAS_RAPIDFUZZ:
+        scores = process.cdist(norm1, norm2, scorer=fuzz.token_set_ratio, processor=None,
+                               dtype=np.float64, workers=-1) / 100.0
     else:
-        return difflib.SequenceMatcher(None, norm1, norm2).ratio()
+        scores = np.array([[difflib.SequenceMatcher(None, a, b).ratio() for b in norm2] for a in norm1])
+    # Match calculate_similarity: an empty side scores 0
+    empty1 = np.array([not s for s in strs1])
+    empty2 = np.array([not s for s in strs2])
+    scores[empty1, :] = 0.0
+    scores[:, empty2] = 0.0
+    return scores
+
+
+_EPOCH = datetime(1970, 1, 1)
+_MINUTE = timedelta(minutes=1)
+
+
+def time_bonus_matrix(dts1: List[Optional[datetime]], dts2: List[Optional[datetime]]) -> np.ndarray:
+    """
+    Kick-off proximity bonus for every pair: 0.35 within 60 minutes, 0.20 within 120,
+    0 otherwise or when either side has no datetime.
+    """
+    valid1 = np.array([d is not None for d in dts1], dtype=bool)
+    valid2 = np.array([d is not None for d in dts2], dtype=bool)
+    mins1 = np.array([(d - _EPOCH) // _MINUTE if d else 0 for d in dts1], dtype=np.int64)
+    mins2 = np.array([(d - _EPOCH) // _MINUTE if d else 0 for d in dts2], dtype=np.int64)
+    diff = np.abs(mins1[:, None] - mins2[None, :])
+    bonus = np.where(diff <= 60, 0.35, np.where(diff <= 120, 0.20, 0.0))
+    bonus[~valid1, :] = 0.0
+    bonus[:, ~valid2] = 0.0
+    return bonus
+
+
+# Upper bound on concurrent LLM verification requests
+LLM_MAX_CONCURRENCY = 4
+
+# LLM verdicts survive across matching cycles, keyed on the normalized
+# (pred home, pred away, site home, site away, league) tuple; oldest evicted first
+LLM_CACHE_SIZE = 2048
+_LLM_VERDICTS: "OrderedDict[tuple, bool]" = OrderedDict()
+
+# Channel weights for team-name and league similarity; the kick-off bonus is added on top
+TEAM_WEIGHT = 0.7
+LEAGUE_WEIGHT = 0.3
+
+
+def build_team_string(home: str, away: str) -> str:
+    """Canonical "home vs away" string with each team name normalized separately."""
+    return f"{normalize_team_name(home)} vs {normalize_team_name(away)}"
 
 
 def build_match_string(region_league: str, home: str, away: str, date: str, time: str) -> str:
@@ -79,6 +159,36 @@ def build_match_string(region_league: str, home: str, away: str, date: str, time
     return f"{region_league}: {home} vs {away} - {date} - {time}".strip().lower()
 
 
+_MONTHS = {m: i for i, m in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+
+def _parse_dmy(s: str) -> tuple:
+    """(year, month, day) from "DD.MM.YYYY", sliced directly with a strptime fallback."""
+    if len(s) == 10 and s[2] == '.' and s[5] == '.' and (s[:2] + s[3:5] + s[6:]).isdecimal():
+        return int(s[6:]), int(s[3:5]), int(s[:2])
+    dt = datetime.strptime(s, "%d.%m.%Y")
+    return dt.year, dt.month, dt.day
+
+
+def _parse_hm(s: str) -> tuple:
+    """(hour, minute) from "HH:MM", sliced directly with a strptime fallback."""
+    if len(s) == 5 and s[2] == ':' and (s[:2] + s[3:]).isdecimal():
+        return int(s[:2]), int(s[3:])
+    dt = datetime.strptime(s, "%H:%M")
+    return dt.hour, dt.minute
+
+
+def _parse_day_mon(s: str) -> tuple:
+    """(month, day) from "17 Dec", looked up directly with a strptime fallback."""
+    day, _, mon = s.partition(' ')
+    month = _MONTHS.get(mon.lower())
+    if month and day.isdecimal():
+        return month, int(day)
+    dt = datetime.strptime(s, "%d %b")
+    return dt.month, dt.day
+
+
 def parse_match_datetime(date_str: str, time_str: str, is_site_format: bool = False) -> Optional[datetime]:
     """
     Parse date and time strings into a datetime object (assumed UTC for predictions, displayed UTC+1 for site).
@@ -100,63 +210,65 @@ def parse_match_datetime(date_str: str, time_str: str, is_site_format: bool = Fa
                 
                 # Try to parse the date part to get day and month
                 # Football.com uses "17 Dec"
-                dt_site_date = datetime.strptime(site_date_part, "%d %b")
-                dt_site_time = datetime.strptime(site_time_part, "%H:%M")
+                month, day = _parse_day_mon(site_date_part)
+                hour, minute = _parse_hm(site_time_part)
                 
                 # Use year from date_str (targetDate)
-                target_year = datetime.strptime(date_str, "%d.%m.%Y").year
-                return datetime(target_year, dt_site_date.month, dt_site_date.day, dt_site_time.hour, dt_site_time.minute)
+                target_year = datetime(*_parse_dmy(date_str)).year
+                return datetime(target_year, month, day, hour, minute)
 
             # Case 2: "14:00"
             if ':' in time_str:
-                dt_time = datetime.strptime(time_str.strip(), "%H:%M")
-                dt_date = datetime.strptime(date_str, "%d.%m.%Y")
-                return datetime(dt_date.year, dt_date.month, dt_date.day, dt_time.hour, dt_time.minute)
+                hour, minute = _parse_hm(time_str)
+                return datetime(*_parse_dmy(date_str), hour, minute)
 
             # Case 3: "Live", "45'", etc. (Treat as "now" on the target date)
-            dt_date = datetime.strptime(date_str, "%d.%m.%Y")
-            return datetime(dt_date.year, dt_date.month, dt_date.day, datetime.now().hour, datetime.now().minute)
+            now = datetime.now()
+            return datetime(*_parse_dmy(date_str), now.hour, now.minute)
 
         except Exception as e:
             # print(f"    [Time Parse Error] Failed to parse site time '{time_str}' with date '{date_str}': {e}")
             return None
     else:
         try:
-            return datetime.strptime(f"{date_str} {time_str}", "%d.%m.%Y %H:%M")
+            return datetime(*_parse_dmy(date_str), *_parse_hm(time_str))
         except ValueError:
             return None
 
 
 async def match_predictions_with_site(day_predictions: List[Dict], site_matches: List[Dict]) -> Dict[str, str]:
     """
-    Match predictions to site matches primarily by holistic string similarity on the full
-    "Region - League: Home vs Away - Date - Time" descriptor, with datetime priority and optional LLM fallback.
+    Match predictions to site matches by weighted team-name and league similarity
+    plus a kick-off proximity bonus, with optional LLM verification for borderline scores.
     """
     # Filter out predictions for matches that have already started (with 5-minute grace)
-    now_utc = datetime.utcnow()
+    # Kick-offs parsed here are kept (parallel to future_predictions) for scoring below
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(minutes=5)
     future_predictions = []
+    pred_utc_dts = []
     for pred in day_predictions:
         pred_date = pred.get('date', '').strip()
         pred_time = pred.get('match_time', '').strip()
         pred_utc_dt = parse_match_datetime(pred_date, pred_time, is_site_format=False)
-        if pred_utc_dt and pred_utc_dt > (now_utc - timedelta(minutes=5)):
+        if pred_utc_dt and pred_utc_dt > cutoff:
             future_predictions.append(pred)
+            pred_utc_dts.append(pred_utc_dt)
 
     if not future_predictions:
-        print("  [Matcher] No future pending predictions found.")
+        log.info("  [Matcher] No future pending predictions found.")
         return {}
 
     day_predictions = future_predictions
-    print(f"  [Matcher] Attempting to match {len(day_predictions)} future predictions.")
+    log.info("  [Matcher] Attempting to match %d future predictions.", len(day_predictions))
 
     # Initialise LLM matcher once if available
     llm_matcher: Optional[Any] = None
     if HAS_LLM and llm_module:
         try:
             llm_matcher = llm_module.SemanticMatcher()
-            print("  [Matcher] LLM Semantic Matcher initialized.")
+            log.info("  [Matcher] LLM Semantic Matcher initialized.")
         except Exception as e:
-            print(f"  [Matcher] Failed to initialise LLM matcher: {e}")
+            log.warning("  [Matcher] Failed to initialise LLM matcher: %s", e)
 
     # --- Pre-filter Site Matches ---
     # Remove matches with empty or suspiciously short names (e.g. " vs ")
@@ -172,113 +284,137 @@ async def match_predictions_with_site(day_predictions: List[Dict], site_matches:
             valid_site_matches.append(m)
     
     if len(valid_site_matches) < len(site_matches):
-        print(f"  [Matcher] Filtered out {len(site_matches) - len(valid_site_matches)} invalid site matches (empty names).")
+        log.info("  [Matcher] Filtered out %d invalid site matches (empty names).", len(site_matches) - len(valid_site_matches))
     site_matches = valid_site_matches
 
     mapping: Dict[str, str] = {}
 
-    used_site_urls = set()
-
-    for pred in day_predictions:
-        pred_id = str(pred.get('fixture_id', ''))
-        pred_region_league = pred.get('region_league', '').strip()
-        pred_home = pred.get('home_team', '').strip()
-        pred_away = pred.get('away_team', '').strip()
-        pred_date = pred.get('date', '').strip()
-        pred_time = pred.get('match_time', '').strip()
-
-        pred_full_str = build_match_string(pred_region_league, pred_home, pred_away, pred_date, pred_time)
-
-        pred_utc_dt = parse_match_datetime(pred_date, pred_time, is_site_format=False)
-
-        # Phase 1: Score all candidates
-        candidates = []
-        for site_match in site_matches:
-            site_url = site_match.get('url', '')
-            if not site_url or site_url in used_site_urls:
-                continue
-
-            site_region_league = site_match.get('league', '').strip()
-            # Handle both DB format (home_team/away_team) and matcher format (home/away)
-            site_home = site_match.get('home', '') or site_match.get('home_team', '')
-            site_away = site_match.get('away', '') or site_match.get('away_team', '')
-            site_home = site_home.strip()
-            site_away = site_away.strip()
-            site_date = site_match.get('date', '').strip()
-            site_time = site_match.get('time', '').strip()
-
-            site_full_str = build_match_string(site_region_league, site_home, site_away, site_date, site_time)
-            full_similarity = calculate_similarity(pred_full_str, site_full_str)
-
-            # Datetime bonus
-            site_display_dt = parse_match_datetime(site_date, site_time, is_site_format=True)
-            site_utc_dt = (site_display_dt - timedelta(hours=1)) if site_display_dt else None
-
-            time_bonus = 0.0
-            if pred_utc_dt and site_utc_dt:
-                time_diff_minutes = abs((pred_utc_dt - site_utc_dt).total_seconds()) / 60
-                if time_diff_minutes <= 60:
-                    time_bonus = 0.35 # Increased weights
-                elif time_diff_minutes <= 120:
-                    time_bonus = 0.20
-            
-            base_score = full_similarity
-            total_score = base_score + time_bonus
-            
-            candidates.append({
-                'match': site_match,
-                'total_score': total_score,
-                'base_score': base_score,
-                'full_str': site_full_str,
-                'utc_dt': site_utc_dt
-            })
-
-        # Phase 2: Select Top Candidate
-        if not candidates:
-            print(f"  ✗ No candidates found for prediction {pred_id} ({pred_home} vs {pred_away})")
+    # Score every (prediction, site) pair up front on separate team, league and
+    # kick-off channels; each site's kick-off is parsed once (site displays UTC+1)
+    site_team_strs = []
+    site_league_strs = []
+    site_utc_dts = []
+    for site_match in site_matches:
+        # Handle both DB format (home_team/away_team) and matcher format (home/away)
+        site_home = (site_match.get('home', '') or site_match.get('home_team', '')).strip()
+        site_away = (site_match.get('away', '') or site_match.get('away_team', '')).strip()
+        site_team_strs.append(build_team_string(site_home, site_away))
+        site_league_strs.append(site_match.get('league', '').strip().lower())
+        site_display_dt = parse_match_datetime(site_match.get('date', '').strip(), site_match.get('time', '').strip(), is_site_format=True)
+        site_utc_dts.append((site_display_dt - timedelta(hours=1)) if site_display_dt else None)
+    pred_team_strs = [build_team_string(p.get('home_team', '').strip(), p.get('away_team', '').strip()) for p in day_predictions]
+    pred_league_strs = [p.get('region_league', '').strip().lower() for p in day_predictions]
+
+    similarity = (TEAM_WEIGHT * similarity_matrix(pred_team_strs, site_team_strs)
+                  + LEAGUE_WEIGHT * similarity_matrix(pred_league_strs, site_league_strs))
+    total_scores = similarity + time_bonus_matrix(pred_utc_dts, site_utc_dts)
+
+    # One-to-one pairing over site matches that carry a URL (first occurrence wins)
+    seen_urls = set()
+    valid_cols = []
+    for j, site_match in enumerate(site_matches):
+        site_url = site_match.get('url', '')
+        if site_url and site_url not in seen_urls:
+            seen_urls.add(site_url)
+            valid_cols.append(j)
+
+    if HAS_SCIPY:
+        # Globally optimal assignment instead of letting early predictions claim the best sites
+        rows, cols = linear_sum_assignment(-total_scores[:, valid_cols])
+        assigned = {int(r): valid_cols[c] for r, c in zip(rows, cols)}
+    else:
+        assigned = None
+        # Greedy fallback scores a copy where URL-less and claimed sites are masked to -inf
+        open_scores = np.full_like(total_scores, -np.inf)
+        open_scores[:, valid_cols] = total_scores[:, valid_cols]
+
+    # Phase 1: Pick each prediction's candidate; strong matches are decided here,
+    # borderline ones are queued for a single batched LLM verification
+    decisions = []  # (pred index, site index, score, accepted or None if pending LLM)
+    borderline = []  # (decision index, pred desc, site desc, league)
+    for i, pred in enumerate(day_predictions):
+        if assigned is not None:
+            j = assigned.get(i)
+        else:
+            # Greedy fallback: best-scoring site match not yet claimed
+            j = int(open_scores[i].argmax()) if valid_cols else None
+            if j is not None and open_scores[i, j] == -np.inf:
+                j = None
+
+        if j is None:
+            log.debug("  ✗ No candidates found for prediction %s (%s vs %s)", pred.get('fixture_id', ''),
+                      pred.get('home_team', '').strip(), pred.get('away_team', '').strip())
             continue
-            
-        candidates.sort(key=lambda x: x['total_score'], reverse=True)
-        top = candidates[0]
-        
-        # Phase 3: LLM Verification (Only for the single best candidate if borderline)
-        final_match_found = False
-        
-        if top['total_score'] >= 0.92:
-            final_match_found = True
-            print(f"    [Matcher] Strong match found: {pred_home} vs {pred_away} (Score: {top['total_score']:.3f})")
-        elif top['total_score'] >= 0.65 and llm_matcher:
-            # Borderline case: Ask AI
-            m = top['match']
+
+        top_score = float(total_scores[i, j])
+        if top_score >= 0.92:
+            decisions.append((i, j, top_score, True))
+            if assigned is None:
+                open_scores[:, j] = -np.inf
+        elif top_score >= 0.65 and llm_matcher:
+            # Borderline case: Ask AI (greedy fallback reserves the site until the verdict is in)
+            pred_league = pred.get('region_league', '').strip()
+            pred_home = pred.get('home_team', '').strip()
+            pred_away = pred.get('away_team', '').strip()
+            m = site_matches[j]
             site_home = m.get('home', '') or m.get('home_team', '')
             site_away = m.get('away', '') or m.get('away_team', '')
-            print(f"    [LLM Check] Verifying borderline candidate: Pred '{pred_home} vs {pred_away}' ↔ Site '{site_home} vs {site_away}' (Score: {top['total_score']:.3f})")
-            if await llm_matcher.is_match(
-                f"{pred_home} vs {pred_away} in {pred_region_league}",
+            borderline.append((
+                len(decisions),
+                f"{pred_home} vs {pred_away} in {pred_league}",
                 f"{site_home} vs {site_away} in {m.get('league', '')}",
-                league=pred_region_league
-            ):
-                print("      -> AI confirmed match!")
-                final_match_found = True
-            else:
-                print("      -> AI rejected match.")
-
-        if final_match_found:
-            site_url = top['match'].get('url')
-            mapping[pred_id] = site_url
-            used_site_urls.add(site_url)
-            time_str = pred_utc_dt.strftime('%Y-%m-%d %H:%M') if pred_utc_dt else 'N/A'
-            m = top['match']
-            site_home = m.get('home', '') or m.get('home_team', '')
-            site_away = m.get('away', '') or m.get('away_team', '')
-            print(f"  [OK] Matched prediction {pred_id} ({pred_home} vs {pred_away} @ {time_str}) "
-                  f"-> {site_home} vs {site_away} (score {top['total_score']:.3f})")
+                pred_league,
+                (normalize_team_name(pred_home), normalize_team_name(pred_away),
+                 normalize_team_name(site_home), normalize_team_name(site_away), pred_league.lower()),
+            ))
+            decisions.append((i, j, top_score, None))
+            if assigned is None:
+                open_scores[:, j] = -np.inf
         else:
-            if top['total_score'] > 0.5: # Only print if there was a somewhat reasonable candidate
-                print(f"  [X] No reliable match found for prediction {pred_id} ({pred_home} vs {pred_away}). Top candidate score {top['total_score']:.3f} was rejected or too low.")
-            else:
-                print(f"  [X] No reliable match found for prediction {pred_id} ({pred_home} vs {pred_away}). All candidates too low.")
+            decisions.append((i, j, top_score, False))
+
+    # Phase 2: LLM Verification, overlapped but capped to what the local server can take
+    if borderline:
+        log.info("    [LLM Check] Verifying %d borderline candidates...", len(borderline))
+        sem = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+
+        async def _verify(desc1: str, desc2: str, league: str, key: tuple) -> bool:
+            if key in _LLM_VERDICTS:
+                _LLM_VERDICTS.move_to_end(key)
+                return _LLM_VERDICTS[key]
+            async with sem:
+                verdict = await llm_matcher.is_match(desc1, desc2, league=league)
+            _LLM_VERDICTS[key] = verdict
+            if len(_LLM_VERDICTS) > LLM_CACHE_SIZE:
+                _LLM_VERDICTS.popitem(last=False)
+            return verdict
+
+        verdicts = await asyncio.gather(*[_verify(a, b, l, key) for _, a, b, l, key in borderline])
+        for (k, desc1, desc2, _, _), verdict in zip(borderline, verdicts):
+            i, j, top_score, _ = decisions[k]
+            decisions[k] = (i, j, top_score, verdict)
+            log.debug("    [LLM Check] '%s' ↔ '%s' (Score: %.3f) -> AI %s match.",
+                      desc1, desc2, top_score, 'confirmed' if verdict else 'rejected')
+
+    # Phase 3: Record mappings
+    for i, j, top_score, accepted in decisions:
+        pred = day_predictions[i]
+        pred_id = str(pred.get('fixture_id', ''))
+        pred_home = pred.get('home_team', '').strip()
+        pred_away = pred.get('away_team', '').strip()
 
+        if accepted:
+            m = site_matches[j]
+            mapping[pred_id] = m.get('url')
+            log.debug("  [OK] Matched prediction %s (%s vs %s @ %s) -> %s vs %s (score %.3f)",
+                      pred_id, pred_home, pred_away, pred_utc_dts[i],
+                      m.get('home', '') or m.get('home_team', ''), m.get('away', '') or m.get('away_team', ''), top_score)
+        elif top_score > 0.5: # Only log if there was a somewhat reasonable candidate
+            log.debug("  [X] No reliable match found for prediction %s (%s vs %s). Top candidate score %.3f was rejected or too low.",
+                      pred_id, pred_home, pred_away, top_score)
+        else:
+            log.debug("  [X] No reliable match found for prediction %s (%s vs %s). All candidates too low.",
+                      pred_id, pred_home, pred_away)
 
-    print(f"  [Matcher] Matching complete: {len(mapping)}/{len(day_predictions)} predictions matched.")
+    log.info("  [Matcher] Matching complete: %d/%d predictions matched.", len(mapping), len(day_predictions))
     return mapping
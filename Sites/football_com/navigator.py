@@ -5,11 +5,14 @@ Handles login, session management, balance extraction, and schedule navigation f
 
 import asyncio
 import os
+import re
 from pathlib import Path
 from datetime import datetime as dt
+from functools import lru_cache
 from typing import Tuple, Optional, cast
 
 from playwright.async_api import Browser, BrowserContext, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 
 from Helpers.Site_Helpers.site_helpers import fb_universal_popup_dismissal
 from Neo.intelligence import get_selector, get_selector_auto, fb_universal_popup_dismissal as neo_popup_dismissal
@@ -23,8 +26,7 @@ PASSWORD = cast(str, os.getenv("FB_PASSWORD"))
 AUTH_DIR = Path("DB/Auth")
 AUTH_FILE = AUTH_DIR / "storage_state.json"
 
-if not PHONE or not PASSWORD:
-    raise ValueError("FB_PHONE and FB_PASSWORD environment variables must be set for login.")
+_BALANCE_RE = re.compile(r'[^\d.]')
 
 async def log_page_title(page: Page, label: str = ""):
     """Logs the current page title and records it to the Page Registry."""
@@ -39,6 +41,17 @@ async def log_page_title(page: Page, label: str = ""):
         return ""
 
 
+async def wait_for_settle(page: Page, idle_timeout: int = 5000):
+    """
+    Wait for network idle, but only briefly: ads and analytics keep the mobile site busy,
+    so a page that never idles falls back to DOM readiness instead of burning a long timeout.
+    """
+    try:
+        await page.wait_for_load_state('networkidle', timeout=idle_timeout)
+    except PlaywrightTimeoutError:
+        await page.wait_for_load_state('domcontentloaded', timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
+
+
 async def load_or_create_session(context: BrowserContext) -> Tuple[BrowserContext, Page]:
     """
     Load session from valid persistent context or perform login if needed.
@@ -76,10 +89,8 @@ async def load_or_create_session(context: BrowserContext) -> Tuple[BrowserContex
         # Validate session by checking for login elements
         login_sel = await get_selector_auto(page, "fb_global", "top_right_login")
         
-        needs_login = False
-        if login_sel:
-            if await page.locator(login_sel).count() > 0 and await page.locator(login_sel).is_visible():
-                needs_login = True
+        # is_visible() is False when nothing matches, so one probe covers presence and visibility
+        needs_login = bool(login_sel) and await page.locator(login_sel).first.is_visible()
         
         if needs_login:
             print("  [Auth] Session expired or not logged in. Performing new login...")
@@ -96,6 +107,9 @@ async def load_or_create_session(context: BrowserContext) -> Tuple[BrowserContex
 
 
 async def perform_login(page: Page):
+    if not PHONE or not PASSWORD:
+        raise RuntimeError("FB_PHONE and FB_PASSWORD environment variables must be set for login.")
+
     print("  [Navigation] Going to Football.com...")
     # Go directly to sports/football if possible, or main mobile page
     await page.goto("https://www.football.com/ng/m/sport/football/", wait_until='domcontentloaded', timeout=NAVIGATION_TIMEOUT)
@@ -104,25 +118,23 @@ async def perform_login(page: Page):
 
     
     try:
-        # Click Top Login Button (if visible)
-        login_selector = await get_selector_auto(page, "fb_login_page", "top_right_login")
-        if login_selector and await page.locator(login_selector).count() > 0:
-             if await page.locator(login_selector).is_visible():
-                 await page.click(login_selector)
-                 print("  [Login] Login page clicked")
-                 await asyncio.sleep(3)
-        
-        # Get Selectors via Auto-Heal
-        mobile_selector = await get_selector_auto(page, "fb_login_page", "center_input_mobile_number")
-        password_selector = await get_selector_auto(page, "fb_login_page", "center_input_password")
-        login_btn_selector = await get_selector_auto(page, "fb_login_page", "bottom_button_login")
+        # Get Selectors via Auto-Heal (independent lookups, resolved together)
+        login_selector, mobile_selector, password_selector, login_btn_selector = await asyncio.gather(*(
+            get_selector_auto(page, "fb_login_page", key)
+            for key in ("top_right_login", "center_input_mobile_number", "center_input_password", "bottom_button_login")
+        ))
 
         # Fallbacks if Auto-Heal returns nothing valid
         if not mobile_selector: mobile_selector = "input[type='tel'], input[placeholder*='Mobile']"
         if not password_selector: password_selector = "input[type='password']"
         if not login_btn_selector: login_btn_selector = "button:has-text('Login')"
 
-        # Input Mobile Number
+        # Click Top Login Button (if visible)
+        if login_selector and await page.locator(login_selector).first.is_visible():
+             await page.click(login_selector)
+             print("  [Login] Login page clicked")
+
+        # Input Mobile Number (waiting on the field itself replaces a fixed post-click sleep)
         print(f"  [Login] Filling mobile number using: {mobile_selector}")
         try:
              await page.wait_for_selector(mobile_selector, state="visible", timeout=30000)
@@ -137,20 +149,16 @@ async def perform_login(page: Page):
              else:
                 raise e # Re-raise if fallback also fails
 
-        await asyncio.sleep(1)
-
         # Input Password
         print(f"  [Login] Filling password using: {password_selector}")
         await page.wait_for_selector(password_selector, state="visible", timeout=10000)
         await page.fill(password_selector, PASSWORD)
-        await asyncio.sleep(1)
 
         # Click Login
         print(f"  [Login] Clicking login button using: {login_btn_selector}")
         await page.click(login_btn_selector)
         
-        await page.wait_for_load_state('networkidle', timeout=30000)
-        await asyncio.sleep(5)
+        await wait_for_settle(page)
         print("[Login] Football.com Login Successful.")
         
     except Exception as e:
@@ -160,7 +168,7 @@ async def perform_login(page: Page):
         try:
             await page.keyboard.press("Tab")
             await page.keyboard.press("Tab") # Navigate around hoping to hit inputs
-        except:
+        except Exception:
             pass
         raise
 
@@ -173,10 +181,12 @@ async def extract_balance(page: Page) -> float:
         balance_sel = await get_selector_auto(page, "fb_match_page", "navbar_balance")
         # await asyncio.sleep(1) # Reduced
 
-        if balance_sel and await page.locator(balance_sel).count() > 0:
-            balance_text = await page.locator(balance_sel).inner_text(timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
-            import re
-            cleaned_text = re.sub(r'[^\d.]', '', balance_text)
+        # One round trip for presence and text; evaluate_all returns [] rather than waiting when absent
+        texts = await page.locator(balance_sel).evaluate_all("els => els.slice(0, 1).map(el => el.innerText)") if balance_sel else []
+        if texts:
+            balance_text = texts[0]
+            # Plain "1234.56" needs no cleaning; currency symbols and separators do
+            cleaned_text = balance_text if balance_text.replace('.', '', 1).isdigit() else _BALANCE_RE.sub('', balance_text)
             if cleaned_text:
                 #print(f"  [Money] Found balance: {balance_text}")
                 return float(cleaned_text)
@@ -228,8 +238,9 @@ async def navigate_to_schedule(page: Page):
     if schedule_sel:
         try:
             print(f"  [Navigation] Trying dynamic selector: {schedule_sel}")
-            if await page.locator(schedule_sel).count() > 0:
-                await page.locator(schedule_sel).first.click(timeout=5000)
+            schedule_loc = page.locator(schedule_sel)
+            if await schedule_loc.count() > 0:
+                await schedule_loc.first.click(timeout=5000)
                 await page.wait_for_load_state('domcontentloaded', timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
                 await log_page_title(page, "Schedule Page")
                 print("  [Navigation] Schedule page loaded via dynamic selector.")
@@ -249,6 +260,12 @@ async def navigate_to_schedule(page: Page):
     await asyncio.sleep(1)
     
 
+@lru_cache(maxsize=32)
+def _parse_target_date(target_date: str) -> dt:
+    """Parse a "DD.MM.YYYY" target date; the same few dates are selected over and over."""
+    return dt.strptime(target_date, "%d.%m.%Y")
+
+
 async def select_target_date(page: Page, target_date: str) -> bool:
     """Select the target date in the schedule and validate using dynamic and robust selectors."""
 
@@ -261,8 +278,9 @@ async def select_target_date(page: Page, target_date: str) -> bool:
     
     if dropdown_sel:
         try:
-            if await page.locator(dropdown_sel).count() > 0:
-                await page.locator(dropdown_sel).first.click()
+            dropdown_loc = page.locator(dropdown_sel)
+            if await dropdown_loc.count() > 0:
+                await dropdown_loc.first.click()
                 print(f"  [Filter] Clicked date dropdown with selector: {dropdown_sel}")
                 dropdown_found = True
                 await asyncio.sleep(1)
@@ -275,7 +293,7 @@ async def select_target_date(page: Page, target_date: str) -> bool:
         return False
 
     # Parse target date and select appropriate day
-    target_dt = dt.strptime(target_date, "%d.%m.%Y")
+    target_dt = _parse_target_date(target_date)
     if target_dt.date() == dt.now().date():
         possible_days = ["Today"]
     else:
@@ -285,64 +303,59 @@ async def select_target_date(page: Page, target_date: str) -> bool:
 
     print(f"  [Filter] Target day options: {possible_days}")
 
-    # Try to find and click the target day
+    # Try to find and click the target day: one locator inside the opened dropdown covers
+    # every accepted label. Like the old text='<day>' probe, some element (the li or a child
+    # such as a <span>) must read exactly the label; the li around it is what gets clicked.
     day_found = False
     league_sorted = False
-    
-    for day in possible_days:
-        try:
-            # Try specific dynamic item selector if available + text filter
-            day_selector = f"text='{day}'"
-            if await page.locator(day_selector).count() > 0:
-                await page.locator(f'li:has-text("{day}")').click()
-                print(f"  [Filter] Successfully selected: {day}")
-                day_found = True
-            else:
-                continue
-        except Exception as e:
-            print(f"  [Filter] Failed to select {day}: {e}")
-            continue
-
-        await page.wait_for_load_state('networkidle', timeout=WAIT_FOR_LOAD_STATE_TIMEOUT)
-        await asyncio.sleep(1)
+    day_pattern = re.compile(r"^\s*(?:" + "|".join(re.escape(d) for d in possible_days) + r")\s*$", re.I)
+    day_items = dropdown_loc.first.locator("li")
+    # has= only looks at descendants, so a bare <li>Today</li> is matched on its own text
+    day_item = day_items.filter(has=page.get_by_text(day_pattern)).or_(day_items.filter(has_text=day_pattern)).first
 
-        # Sort by League (Mandatory)
-        try:
-            sort_sel = await get_selector_auto(page, "fb_schedule_page", "sort_dropdown")
-            print(f"  [Debug] sort_sel: {sort_sel}")
-            if sort_sel:
-                if await page.locator(sort_sel).count() > 0:
-                    await page.locator(sort_sel).first.click()
-                    await asyncio.sleep(1)
-
-                    # Try to select "League" from dropdown options (Content filter)
-                    target_sort = "League"
-                    league_selector = f"text='{target_sort}'"
-                    await page.locator(f'{sort_sel} >> div.m-list').wait_for(state="visible")
-                    await page.locator(f'{sort_sel} >> li:has-text("{target_sort}")').click()
-                    print("  [Filter] Successfully sorted by League")
-                    league_sorted = True
-                    await asyncio.sleep(1)
-                    break
-                else:
-                        print("  [Filter] Sort dropdown not visible on page")
-                        
-        except Exception as e:
-            print(f"  [Filter] League sorting failed: {e}")
-
-        if day_found and not league_sorted:
-             print(f"  [Filter] Date selected but mandatory League sorting failed.")
-             await capture_debug_snapshot(page, "fail_league_sort", "Date selected, but failed to sort by League.")
-             return False
+    try:
+        if await day_item.count() > 0:
+            await day_item.click()
+            print(f"  [Filter] Successfully selected: {possible_days}")
+            day_found = True
+    except Exception as e:
+        print(f"  [Filter] Failed to select {possible_days}: {e}")
 
     if not day_found:
         print(f"  [Filter] Day {possible_days} not available in dropdown for {target_date}")
         await capture_debug_snapshot(page, "fail_day_select", f"Could not find day options {possible_days}")
         return False
 
+    await wait_for_settle(page)
+    await asyncio.sleep(1)
+
+    # Sort by League (Mandatory)
+    try:
+        sort_sel = await get_selector_auto(page, "fb_schedule_page", "sort_dropdown")
+        print(f"  [Debug] sort_sel: {sort_sel}")
+        if sort_sel:
+            sort_loc = page.locator(sort_sel)
+            if await sort_loc.count() > 0:
+                await sort_loc.first.click()
+                await asyncio.sleep(1)
+
+                # Try to select "League" from dropdown options (Content filter)
+                target_sort = "League"
+                await sort_loc.locator('div.m-list').wait_for(state="visible")
+                await sort_loc.locator(f'li:has-text("{target_sort}")').click()
+                print("  [Filter] Successfully sorted by League")
+                league_sorted = True
+                await asyncio.sleep(1)
+            else:
+                    print("  [Filter] Sort dropdown not visible on page")
+                    
+    except Exception as e:
+        print(f"  [Filter] League sorting failed: {e}")
+
     if not league_sorted:
-        print(f"  [Filter] Mandatory sorting (Date & League) failed for {target_date}")
-        return False
+         print(f"  [Filter] Date selected but mandatory League sorting failed.")
+         await capture_debug_snapshot(page, "fail_league_sort", "Date selected, but failed to sort by League.")
+         return False
 
 
     # Date validation - check if target date was selected
@@ -353,28 +366,28 @@ async def select_target_date(page: Page, target_date: str) -> bool:
         
         if time_sel:
             try:
-                if await page.locator(time_sel).count() > 0:
-                    sample_time = (await page.locator(time_sel).first.inner_text(timeout=3000)).strip()
-                    if sample_time:
-                        try:
-                            # Intelligent Date Validation: Compare "29 Dec" (sample) with "29.12" (target)
-                            target_dt = dt.strptime(target_date, "%d.%m.%Y")
-                            
-                            # Sample format expected: "29 Dec, 17:00"
-                            date_part_str = sample_time.split(',')[0].strip()
-                            # Append target year to handle leap years correctly during parsing
-                            sample_dt = dt.strptime(f"{date_part_str} {target_dt.year}", "%d %b %Y")
-                            
-                            if sample_dt.day == target_dt.day and sample_dt.month == target_dt.month:
-                                print(f"  [Navigation] Page validation successful - found match times {sample_time} matching {target_date}")
-                                return True
-                            else:
-                                print(f"  [Navigation] Validation Mismatch: Page shows {sample_time}, expected {target_date}")
-                                return False
-                        except ValueError:
-                            print(f"  [Navigation] Validation warning: Could not parse date from '{sample_time}'. Assuming invalid.")
+                # inner_text waits for the first row to attach, so no separate count() probe
+                sample_time = (await page.locator(time_sel).first.inner_text(timeout=3000)).strip()
+                if sample_time:
+                    try:
+                        # Intelligent Date Validation: Compare "29 Dec" (sample) with "29.12" (target)
+                        target_dt = _parse_target_date(target_date)
+                        
+                        # Sample format expected: "29 Dec, 17:00"
+                        date_part_str = sample_time.split(',')[0].strip()
+                        # Append target year to handle leap years correctly during parsing
+                        sample_dt = dt.strptime(f"{date_part_str} {target_dt.year}", "%d %b %Y")
+                        
+                        if sample_dt.day == target_dt.day and sample_dt.month == target_dt.month:
+                            print(f"  [Navigation] Page validation successful - found match times {sample_time} matching {target_date}")
+                            return True
+                        else:
+                            print(f"  [Navigation] Validation Mismatch: Page shows {sample_time}, expected {target_date}")
                             return False
-            except Exception:
+                    except ValueError:
+                        print(f"  [Navigation] Validation warning: Could not parse date from '{sample_time}'. Assuming invalid.")
+                        return False
+            except PlaywrightTimeoutError:
                 pass
         
         print("  [Navigation] Page validation warning: Time elements not found using configured selector")